@@ -115,8 +115,15 @@ logging.basicConfig(
     ]
 )
 
+@st.cache_resource(show_spinner=False)
+def init_database() -> bool:
+    """Crée les tables manquantes une seule fois par processus, et non à chaque rerun."""
+    Base.metadata.create_all(bind=engine)
+    return True
+
+
 # Assurez-vous que la base de données est initialisée
-Base.metadata.create_all(bind=engine)
+init_database()
 
 # Initialiser toutes les variables de session
 initialize_session_state()
@@ -153,8 +160,15 @@ st.session_state.get("user_id")
 
 from dotenv import load_dotenv
 
+
+@st.cache_resource(show_spinner=False)
+def load_environment() -> bool:
+    """Lit le fichier .env une seule fois par processus, et non à chaque rerun."""
+    return load_dotenv()
+
+
 # Chargement des variables d'environnement
-load_dotenv()
+load_environment()
 
 # Chemin relatif pour le logo
 logo = os.path.join(BASE_DIR, "image", "logo.jpg")
@@ -205,6 +219,40 @@ st.markdown(f"""
     background-color: {mode_color};
     color: {text_color};
 }}
+
+/* Badges de mots-clés et chronologie des chapitres (page Transcription) */
+.kw-badge {{
+    background-color: #1E90FF;
+    color: white;
+    padding: 5px 10px;
+    margin: 5px;
+    border-radius: 15px;
+    display: inline-block;
+}}
+
+.chap-row {{
+    display: flex;
+    gap: 8px;
+    margin-bottom: 5px;
+}}
+
+.chap-time {{
+    flex: 1;
+    background-color: #1E6FCC;
+    color: white;
+    text-align: center;
+    padding: 8px;
+    border-radius: 5px;
+    font-weight: bold;
+}}
+
+.chap-text {{
+    flex: 5;
+    background-color: #333;
+    color: white;
+    padding: 8px;
+    border-radius: 5px;
+}}
 </style>
 """, unsafe_allow_html=True)
 # ---------------------
@@ -233,6 +281,9 @@ with st.sidebar:
 
     menu_bottom = ["API Clés", "Paramètres", "Mon Compte"]
 
+    # Option du radio de navigation qui sépare les deux groupes de pages
+    MENU_SEPARATOR = "---"
+
     # Navigation adaptative selon le type d'appareil
     if st.session_state.is_mobile:
         # Version mobile: menu déroulant
@@ -249,18 +300,31 @@ with st.sidebar:
             st.session_state.selected_page = selected_page
             st.rerun()
     else:
-        # Version desktop: boutons
-        for item in menu_top:
-            if st.button(item, key=f"menu_{item}", use_container_width=True):
-                st.session_state.selected_page = item
-
-        # Espacement vers le bas
-        st.markdown("<div style='margin-top: 200px;'></div>", unsafe_allow_html=True)
-
-        # Boutons du bas
-        for item in menu_bottom:
-            if st.button(item, key=f"menu_{item}", use_container_width=True):
-                st.session_state.selected_page = item
+        # Version desktop: un seul widget radio plutôt qu'un bouton par page,
+        # avec un séparateur entre les pages principales et celles du compte
+        menu_items = menu_top + [MENU_SEPARATOR] + menu_bottom
+
+        def select_page():
+            """Choix dans le radio (exécuté avant le script): le séparateur n'est pas une page."""
+            if st.session_state.nav_radio == MENU_SEPARATOR:
+                st.session_state.nav_radio = st.session_state.selected_page
+            else:
+                st.session_state.selected_page = st.session_state.nav_radio
+
+        # La page peut avoir été changée par programme (selected_page puis
+        # st.rerun): le radio, à clé stable, est aligné avant d'être affiché
+        if (st.session_state.selected_page in menu_items
+                and st.session_state.get("nav_radio") != st.session_state.selected_page):
+            st.session_state.nav_radio = st.session_state.selected_page
+
+        st.radio(
+            "Navigation",
+            options=menu_items,
+            key="nav_radio",
+            on_change=select_page,
+            format_func=lambda item: "─" * 20 if item == MENU_SEPARATOR else item,
+            label_visibility="collapsed"
+        )
 
 # ---------------------
 # Routes / Pages principales
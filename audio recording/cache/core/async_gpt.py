@@ -0,0 +1,86 @@
+# core/async_gpt.py
+import asyncio
+from typing import Dict, Optional
+
+from .gpt_processor import (
+    build_summary_prompt, build_keywords_prompt, build_question_prompt, combined_analysis,
+    summarize_text, extract_keywords, SUMMARY_CHUNK_TOKENS, KEYWORDS_CHUNK_TOKENS
+)
+from .openai_parallel import run_parallel
+from .utils import chunk_text
+
+
+async def run_all(
+    api_key: str,
+    text: str,
+    question: Optional[str] = None,
+    model: str = "gpt-3.5-turbo",
+    temperature: float = 0.7,
+    style: str = "bullet"
+) -> Dict[str, str]:
+    """
+    Génère en une fois le résumé, les mots-clés et éventuellement la réponse à
+    une question: les requêtes indépendantes partent en parallèle au lieu de
+    s'enchaîner.
+
+    Pour un texte court, résumé et mots-clés sont demandés en un seul appel
+    (combined_analysis: le texte n'est envoyé qu'une fois), les prompts
+    séparés ne servant qu'en repli; la question part en même temps (un client
+    AsyncOpenAI pour toutes, voir run_parallel). Un texte long est résumé en
+    map-reduce (summarize_text) dans un thread, en même temps; de même pour
+    ses mots-clés s'il dépasse KEYWORDS_CHUNK_TOKENS.
+
+    Args:
+        api_key: Clé API OpenAI
+        text: Texte transcrit
+        question: Question sur le texte (facultative)
+        model: Modèle GPT à utiliser
+        temperature: Température de génération
+        style: Style du résumé (bullet, concise, detailed)
+
+    Returns:
+        {"summary", "keywords"} et {"answer"} si une question est posée; une
+        erreur est renvoyée sous forme de texte "Erreur..."
+    """
+    if not text:
+        raise ValueError("Le texte est vide.")
+
+    prompts = {}
+    threaded = {}
+
+    if len(chunk_text(text, max_tokens=KEYWORDS_CHUNK_TOKENS, model=model)) == 1:
+        prompts["keywords"] = build_keywords_prompt(text)
+    else:
+        threaded["keywords"] = asyncio.to_thread(extract_keywords, text, api_key, model)
+
+    if question and question.strip():
+        prompts["answer"] = build_question_prompt(text, question)
+
+    chunks = chunk_text(text, max_tokens=SUMMARY_CHUNK_TOKENS, model=model)
+    if len(chunks) == 1:
+        prompts["summary"] = build_summary_prompt(chunks[0], style)
+    else:
+        threaded["summary"] = asyncio.to_thread(summarize_text, text, api_key, model, temperature, style)
+
+    # Résumé et mots-clés d'un texte court: un seul appel, prompts séparés en repli
+    fallback = {}
+    if "summary" in prompts and "keywords" in prompts:
+        fallback = {kind: prompts.pop(kind) for kind in ("summary", "keywords")}
+        threaded["combined"] = asyncio.to_thread(combined_analysis, text, api_key, model, temperature, style)
+
+    # Pas de client AsyncOpenAI si tout passe par les threads
+    direct = (
+        run_parallel(list(prompts.values()), api_key, model=model, temperature=temperature)
+        if prompts else asyncio.sleep(0, result=[])
+    )
+    answers, *threaded_results = await asyncio.gather(direct, *threaded.values())
+    results = dict(zip(prompts, answers))
+    results.update(zip(threaded, threaded_results))
+
+    if fallback:
+        combined = results.pop("combined")
+        if combined is None:
+            answers = await run_parallel(list(fallback.values()), api_key, model=model, temperature=temperature)
+            combined = dict(zip(fallback, answers))
+        results.update(combined)
+    return results
@@ -1,18 +1,159 @@
 # core/audio_extractor.py
 import os
+import asyncio
 import tempfile
+import shutil
 import subprocess
 import yt_dlp
 import certifi
 import logging
+from typing import List, Optional, Tuple, Union
 from .error_handling import handle_error, ErrorType
 
 os.environ['SSL_CERT_FILE'] = certifi.where()
 
-def download_youtube_audio(url: str):
+# Formats de sortie audio: l'Opus mono 16 kHz suffit pour la voix et pèse
+# 10 à 20 fois moins que le WAV PCM. Le WAV reste disponible sur demande.
+AUDIO_FORMATS = {
+    'opus': {
+        'ext': 'ogg',
+        'mime': 'audio/ogg',
+        'ydl_codec': 'opus',
+        'ydl_quality': '24',
+        'ffmpeg_args': ['-c:a', 'libopus', '-b:a', '24k', '-ac', '1', '-ar', '16000', '-application', 'voip'],
+    },
+    'wav': {
+        'ext': 'wav',
+        'mime': 'audio/wav',
+        'ydl_codec': 'wav',
+        'ydl_quality': '192',
+        'ffmpeg_args': ['-acodec', 'pcm_s16le', '-ar', '44100', '-ac', '2'],
+    },
+}
+DEFAULT_AUDIO_FORMAT = 'opus'
+
+# Résultat d'une extraction en lot: (chemin audio, None) ou (None, message d'erreur)
+ExtractionResult = Tuple[Optional[str], Optional[str]]
+
+# Codecs déjà compressés acceptés par Whisper: la piste est copiée telle
+# quelle (sans décodage ni réencodage) dans le conteneur indiqué.
+COPYABLE_AUDIO_CODECS = {
+    'aac': 'm4a',
+    'opus': 'ogg',
+    'mp3': 'mp3',
+    'flac': 'flac',
+}
+AUDIO_MIME_TYPES = {
+    'm4a': 'audio/mp4',
+    'ogg': 'audio/ogg',
+    'mp3': 'audio/mpeg',
+    'flac': 'audio/flac',
+    'wav': 'audio/wav',
+}
+
+def _build_ydl_opts(output_dir: str, target_format: str = DEFAULT_AUDIO_FORMAT) -> dict:
+    """Options yt-dlp communes: un fichier audio par vidéo, nommé d'après son identifiant."""
+    audio_format = AUDIO_FORMATS[target_format]
+    ydl_opts = {
+        'format': 'bestaudio/best',
+        'outtmpl': os.path.join(output_dir, '%(id)s.%(ext)s'),
+        'postprocessors': [
+            {
+                'key': 'FFmpegExtractAudio',
+                'preferredcodec': audio_format['ydl_codec'],
+                'preferredquality': audio_format['ydl_quality'],
+            }
+        ],
+    }
+    if target_format == 'opus':
+        # Mono 16 kHz, profil voix: ce dont Whisper a besoin, rien de plus
+        ydl_opts['postprocessor_args'] = ['-ac', '1', '-ar', '16000', '-application', 'voip']
+    return ydl_opts
+
+
+def _download_to_dir(ydl, url: str, output_dir: str, target_format: str = DEFAULT_AUDIO_FORMAT) -> str:
+    """Télécharge une URL avec une session yt-dlp existante et renvoie le chemin du fichier audio produit."""
+    info = ydl.extract_info(url, download=True)
+    # Pour une playlist, seule la première vidéo est utilisée
+    if info.get('entries'):
+        info = info['entries'][0]
+
+    audio_format = AUDIO_FORMATS[target_format]
+    produced_path = os.path.join(output_dir, f"{info['id']}.{audio_format['ydl_codec']}")
+    final_path = os.path.join(output_dir, f"{info['id']}.{audio_format['ext']}")
+    if produced_path != final_path:
+        # yt-dlp nomme le conteneur Ogg ".opus", extension refusée par les formulaires d'upload
+        os.replace(produced_path, final_path)
+    return final_path
+
+
+def download_youtube_audio_batch(urls: List[str],
+                                 target_format: str = DEFAULT_AUDIO_FORMAT) -> List[Tuple[str, Union[bytes, str]]]:
     """
-    Télécharge l'audio d'une vidéo YouTube en WAV via yt-dlp
-    et renvoie le contenu binaire (bytes) du fichier WAV.
+    Télécharge l'audio de plusieurs vidéos YouTube (Opus par défaut, WAV si
+    target_format="wav") avec une seule instance yt-dlp, afin de réutiliser
+    les connexions HTTP et les cookies.
+    Renvoie une liste de tuples (url, contenu audio en bytes). En cas d'erreur
+    sur une URL, le second élément est le message d'erreur.
+    """
+    results = []
+
+    # On crée un dossier temporaire pour stocker la sortie de yt-dlp
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # Une seule session yt-dlp pour toutes les URLs
+        with yt_dlp.YoutubeDL(_build_ydl_opts(temp_dir, target_format)) as ydl:
+            for url in urls:
+                if not url.strip():
+                    results.append((url, handle_error(ValueError("URL vide"), ErrorType.INPUT_ERROR,
+                                                      "Veuillez fournir une URL YouTube valide.")))
+                    continue
+
+                try:
+                    final_file_path = _download_to_dir(ydl, url, temp_dir, target_format)
+
+                    # Lecture du contenu en binaire
+                    with open(final_file_path, 'rb') as f:
+                        results.append((url, f.read()))
+
+                except Exception as e:
+                    results.append((url, handle_error(
+                        e, ErrorType.PROCESSING_ERROR,
+                        "Échec du téléchargement ou de la conversion depuis YouTube. Vérifiez l'URL et réessayez.")))
+
+    # À la fin du bloc with, tout le dossier temp est automatiquement supprimé
+    return results
+
+
+def download_youtube_audio_path(url: str, target_format: str = DEFAULT_AUDIO_FORMAT) -> Optional[str]:
+    """
+    Télécharge l'audio d'une vidéo YouTube (Opus par défaut, WAV si
+    target_format="wav") et renvoie le chemin du fichier, sans charger son
+    contenu en mémoire.
+    Le fichier est placé dans un dossier temporaire dédié que l'appelant doit
+    supprimer (shutil.rmtree sur le dossier parent) une fois le fichier utilisé.
+    En cas d'erreur, renvoie None.
+    """
+    if not url.strip():
+        handle_error(ValueError("URL vide"), ErrorType.INPUT_ERROR,
+                     "Veuillez fournir une URL YouTube valide.")
+        return None
+
+    temp_dir = tempfile.mkdtemp(prefix="tflow_yt_")
+    try:
+        with yt_dlp.YoutubeDL(_build_ydl_opts(temp_dir, target_format)) as ydl:
+            return _download_to_dir(ydl, url, temp_dir, target_format)
+
+    except Exception as e:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        handle_error(e, ErrorType.PROCESSING_ERROR,
+                     "Échec du téléchargement ou de la conversion depuis YouTube. Vérifiez l'URL et réessayez.")
+        return None
+
+
+def download_youtube_audio(url: str, target_format: str = DEFAULT_AUDIO_FORMAT):
+    """
+    Télécharge l'audio d'une vidéo YouTube via yt-dlp (Opus par défaut, WAV
+    si target_format="wav") et renvoie le contenu binaire (bytes) du fichier.
     En cas d'erreur, renvoie une chaîne commençant par "ERROR".
     """
     try:
@@ -20,45 +161,73 @@ def download_youtube_audio(url: str):
             return handle_error(ValueError("URL vide"), ErrorType.INPUT_ERROR,
                                "Veuillez fournir une URL YouTube valide.")
 
-        # On crée un dossier temporaire pour stocker la sortie de yt-dlp
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # Modèle de chemin de sortie pour yt-dlp
-            output_path_template = os.path.join(temp_dir, 'downloaded_audio.%(ext)s')
-
-            # Options pour yt-dlp
-            ydl_opts = {
-                'format': 'bestaudio/best',
-                'outtmpl': output_path_template,
-                'postprocessors': [
-                    {
-                        'key': 'FFmpegExtractAudio',
-                        'preferredcodec': 'wav',   # peut être "mp3", "flac", etc.
-                        'preferredquality': '192', # n'affecte pas le WAV, mais ne gêne pas
-                    }
-                ],
-            }
+        return download_youtube_audio_batch([url], target_format)[0][1]
 
-            # Téléchargement et extraction audio via yt-dlp
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.download([url])
+    except Exception as e:
+        return handle_error(e, ErrorType.PROCESSING_ERROR,
+                           f"Échec du téléchargement ou de la conversion depuis YouTube. Vérifiez l'URL et réessayez.")
 
-            # Fichier final produit par yt-dlp
-            final_file_path = os.path.join(temp_dir, 'downloaded_audio.wav')
+def probe_audio_codec(file_path: str) -> Optional[str]:
+    """
+    Renvoie le nom du codec de la première piste audio (ex: "aac") via
+    ffprobe, ou None si le fichier n'a pas de piste audio lisible.
+    """
+    try:
+        codec = subprocess.check_output([
+            'ffprobe', '-v', 'error',
+            '-select_streams', 'a:0',
+            '-show_entries', 'stream=codec_name',
+            '-of', 'default=nw=1:nk=1',
+            file_path
+        ], stderr=subprocess.DEVNULL)
+    except (OSError, subprocess.CalledProcessError) as e:
+        logging.warning(f"ffprobe indisponible ou en échec pour {file_path}: {e}")
+        return None
+    return codec.decode('ascii', errors='ignore').strip() or None
 
-            # Lecture du contenu en binaire
-            with open(final_file_path, 'rb') as f:
-                audio_bytes = f.read()
 
-            # À la fin du bloc with, tout le dossier temp est automatiquement supprimé
-            return audio_bytes
+def audio_mime_type(audio_path: str) -> str:
+    """Renvoie le type MIME d'un fichier audio produit par ce module, d'après son extension."""
+    ext = os.path.splitext(audio_path)[1].lstrip('.').lower()
+    return AUDIO_MIME_TYPES.get(ext, 'application/octet-stream')
 
-    except Exception as e:
-        return handle_error(e, ErrorType.PROCESSING_ERROR,
-                           f"Échec du téléchargement ou de la conversion depuis YouTube. Vérifiez l'URL et réessayez.")
 
-def extract_audio_from_mp4(file_path: str) -> str:
+def _build_extract_cmd(file_path: str, target_format: str = DEFAULT_AUDIO_FORMAT,
+                       extra_args: Tuple[str, ...] = ()) -> Tuple[List[str], str]:
     """
-    Extrait la piste audio d'un fichier .mp4 local en .wav via FFmpeg.
+    Construit la commande FFmpeg d'extraction et renvoie (commande, chemin de sortie).
+    Si la cible est compressée et que la piste source l'est déjà dans un codec
+    accepté par Whisper, la piste est copiée sans réencodage.
+    """
+    base_name = os.path.splitext(os.path.basename(file_path))[0]
+    temp_dir = tempfile.gettempdir()
+
+    source_codec = probe_audio_codec(file_path) if target_format != 'wav' else None
+    if source_codec in COPYABLE_AUDIO_CODECS:
+        audio_path = os.path.join(temp_dir, f"{base_name}.{COPYABLE_AUDIO_CODECS[source_codec]}")
+        codec_args = ['-map', '0:a:0', '-c:a', 'copy']
+    else:
+        audio_format = AUDIO_FORMATS[target_format]
+        audio_path = os.path.join(temp_dir, f"{base_name}.{audio_format['ext']}")
+        codec_args = audio_format['ffmpeg_args']
+
+    cmd = [
+        'ffmpeg', '-y',
+        '-i', file_path,
+        '-vn',
+        *codec_args,
+        *extra_args,
+        audio_path
+    ]
+    return cmd, audio_path
+
+
+def extract_audio_from_mp4(file_path: str, target_format: str = DEFAULT_AUDIO_FORMAT) -> str:
+    """
+    Extrait la piste audio d'un fichier .mp4 local via FFmpeg, en Opus
+    (conteneur .ogg) par défaut ou en .wav si target_format="wav".
+    Hors WAV, une piste déjà en AAC/Opus/MP3/FLAC est copiée sans réencodage
+    et garde l'extension de son codec (voir COPYABLE_AUDIO_CODECS).
     Retourne le chemin du fichier audio résultant.
     """
     if not file_path:
@@ -66,24 +235,58 @@ def extract_audio_from_mp4(file_path: str) -> str:
                            "Aucun fichier vidéo n'a été fourni.")
 
     try:
-        base_name = os.path.splitext(os.path.basename(file_path))[0]
-        temp_dir = tempfile.gettempdir()
-        audio_path = os.path.join(temp_dir, f"{base_name}.wav")
-
-        cmd = [
-            'ffmpeg', '-y',
-            '-i', file_path,
-            '-vn',
-            '-acodec', 'pcm_s16le',
-            '-ar', '44100',
-            '-ac', '2',
-            '-compression_level', '8',
-            audio_path
-        ]
+        cmd, audio_path = _build_extract_cmd(file_path, target_format)
         subprocess.run(cmd, check=True)
 
         return audio_path
 
     except Exception as e:
         return handle_error(e, ErrorType.PROCESSING_ERROR,
-                           "Échec de l'extraction audio. Vérifiez que le format vidéo est supporté et que ffmpeg est correctement installé.")
\ No newline at end of file
+                           "Échec de l'extraction audio. Vérifiez que le format vidéo est supporté et que ffmpeg est correctement installé.")
+
+
+async def extract_audio_from_mp4_async(paths: List[str],
+                                       target_format: str = DEFAULT_AUDIO_FORMAT) -> List[ExtractionResult]:
+    """
+    Extrait la piste audio de plusieurs fichiers vidéo en parallèle, avec au
+    plus un processus FFmpeg par cœur. Chaque FFmpeg est limité à un thread:
+    c'est l'ordonnanceur du système qui répartit les fichiers sur les cœurs.
+    Renvoie, dans l'ordre des entrées, des tuples (chemin audio, None) en cas
+    de succès ou (None, message d'erreur) en cas d'échec; l'affichage des
+    erreurs est laissé à l'appelant.
+    """
+    semaphore = asyncio.Semaphore(os.cpu_count() or 1)
+
+    async def _extract_one(file_path: str) -> str:
+        if not file_path:
+            raise ValueError("Aucun fichier fourni")
+        # ffprobe (subprocess bloquant) dans un thread pour ne pas geler la boucle
+        cmd, audio_path = await asyncio.to_thread(_build_extract_cmd, file_path, target_format, ('-threads', '1'))
+        async with semaphore:
+            process = await asyncio.create_subprocess_exec(
+                *cmd, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE
+            )
+            _, stderr = await process.communicate()
+        if process.returncode != 0:
+            # Dernière ligne de la sortie d'erreur de FFmpeg: la cause de l'échec
+            lines = stderr.decode('utf-8', errors='replace').strip().splitlines()
+            raise RuntimeError(lines[-1] if lines else f"ffmpeg a échoué (code {process.returncode})")
+        return audio_path
+
+    results = await asyncio.gather(*(_extract_one(p) for p in paths), return_exceptions=True)
+
+    extracted = []
+    for path, result in zip(paths, results):
+        if isinstance(result, Exception):
+            logging.error(f"Échec de l'extraction audio de {path}: {result}")
+            extracted.append((None, str(result) or type(result).__name__))
+        else:
+            extracted.append((result, None))
+    return extracted
+
+
+def extract_audio_batch(paths: List[str], target_format: str = DEFAULT_AUDIO_FORMAT) -> List[ExtractionResult]:
+    """
+    Version synchrone de extract_audio_from_mp4_async, utilisable depuis une page Streamlit.
+    """
+    return asyncio.run(extract_audio_from_mp4_async(paths, target_format))
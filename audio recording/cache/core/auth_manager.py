@@ -12,9 +12,12 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # 1 semaine
 
 
-def get_password_hash(password):
-    """Génère un hash de mot de passe avec bcrypt"""
-    salt = bcrypt.gensalt()
+def get_password_hash(password, rounds=None):
+    """
+    Génère un hash de mot de passe avec bcrypt.
+    `rounds` permet d'abaisser le coût (défaut bcrypt: 12) pour les environnements de dev.
+    """
+    salt = bcrypt.gensalt(rounds) if rounds else bcrypt.gensalt()
     return bcrypt.hashpw(password.encode(), salt).decode()
 
 
@@ -1,8 +1,11 @@
 # core/error_handling.py
 import logging
 import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 from typing import Optional, Any, Callable
 
+logger = logging.getLogger(__name__)
+
 
 class ErrorType:
     """Constantes d'erreurs pour standardiser les messages"""
@@ -36,16 +39,15 @@ def handle_error(error: Exception, error_type: str, custom_message: Optional[str
         Message d'erreur formaté
     """
     # Log technique complet pour les développeurs
-    logging.error(f"{error_type}: {str(error)}")
+    logger.error("%s: %s", error_type, error)
 
     # Message utilisateur
     user_message = custom_message or ERROR_MESSAGES.get(error_type, "Une erreur s'est produite.")
 
-    # Affichage Streamlit si dans un contexte Streamlit
-    try:
+    # Affichage Streamlit uniquement dans un contexte de script Streamlit
+    # (tests, worker Celery et threads annexes n'en ont pas)
+    if get_script_run_ctx() is not None:
         st.error(user_message)
-    except:
-        pass  # Ignore si pas dans un contexte Streamlit
 
     return user_message
 
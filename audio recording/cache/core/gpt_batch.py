@@ -0,0 +1,174 @@
+# core/gpt_batch.py
+import json
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .gpt_processor import (
+    get_openai_client, partial_summary_prompts, reduce_summaries, finalize_summary, SUMMARY_CHUNK_TOKENS
+)
+from .utils import chunk_text
+
+# Point d'accès et délai de traitement des lots (API Batch d'OpenAI: -50 % sur le coût)
+BATCH_ENDPOINT = "/v1/chat/completions"
+BATCH_COMPLETION_WINDOW = "24h"
+
+# États définitifs d'un lot qui ne produira pas de résultats
+BATCH_FAILED_STATUSES = ("failed", "expired", "cancelled")
+
+
+def chat_batch_request(custom_id: str, prompt: str, model: str = "gpt-3.5-turbo",
+                       temperature: float = 0.7) -> Dict:
+    """
+    Construit une requête de lot pour un prompt GPT.
+
+    Args:
+        custom_id: Identifiant de la requête, repris dans la réponse
+        prompt: Prompt complet à envoyer
+        model: Modèle GPT à utiliser
+        temperature: Température de génération
+
+    Returns:
+        Requête {"custom_id", "body"} à passer à submit_batch
+    """
+    return {
+        "custom_id": custom_id,
+        "body": {
+            "model": model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": temperature,
+        },
+    }
+
+
+def submit_batch(requests: List[Dict], api_key: str) -> str:
+    """
+    Envoie des requêtes GPT à l'API Batch: un fichier JSONL est téléversé puis
+    traité par OpenAI sous 24 h, hors des limites de débit des appels directs.
+
+    Args:
+        requests: Requêtes {"custom_id", "body"} (voir chat_batch_request)
+        api_key: Clé API OpenAI
+
+    Returns:
+        Identifiant du lot, à passer à poll_batch
+    """
+    lines = "\n".join(
+        json.dumps({
+            "custom_id": request["custom_id"],
+            "method": "POST",
+            "url": BATCH_ENDPOINT,
+            "body": request["body"],
+        }, ensure_ascii=False)
+        for request in requests
+    )
+
+    client = get_openai_client(api_key)
+    batch_file = client.files.create(file=("batch.jsonl", lines.encode("utf-8")), purpose="batch")
+    batch = client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint=BATCH_ENDPOINT,
+        completion_window=BATCH_COMPLETION_WINDOW,
+    )
+    logging.info(f"Lot GPT {batch.id} soumis ({len(requests)} requêtes)")
+    return batch.id
+
+
+def poll_batch(batch_id: str, api_key: str, expected_ids: Optional[Iterable[str]] = None) -> Optional[Dict[str, str]]:
+    """
+    Vérifie l'état d'un lot et lit ses résultats s'il est terminé: le fichier
+    de sortie (requêtes réussies) et le fichier d'erreurs (requêtes en échec).
+
+    Args:
+        batch_id: Identifiant renvoyé par submit_batch
+        api_key: Clé API OpenAI
+        expected_ids: custom_id soumis; une requête absente des deux fichiers
+            est renvoyée sous forme "Erreur..."
+
+    Returns:
+        None si le lot est encore en cours, sinon les réponses texte par
+        custom_id (une requête en échec est renvoyée sous forme "Erreur...")
+
+    Raises:
+        RuntimeError: Si le lot a échoué, expiré ou été annulé
+    """
+    client = get_openai_client(api_key)
+    batch = client.batches.retrieve(batch_id)
+
+    if batch.status in BATCH_FAILED_STATUSES:
+        raise RuntimeError(f"Le lot GPT {batch_id} n'a pas abouti (statut: {batch.status})")
+    if batch.status != "completed":
+        return None
+
+    results = {}
+    # Un lot dont toutes les requêtes ont échoué n'a pas de fichier de sortie
+    for file_id in (batch.output_file_id, batch.error_file_id):
+        if not file_id:
+            continue
+        for line in client.files.content(file_id).text.splitlines():
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            response = item.get("response") or {}
+            if response.get("status_code") == 200:
+                results[item["custom_id"]] = response["body"]["choices"][0]["message"]["content"].strip()
+            else:
+                error = item.get("error") or (response.get("body") or {}).get("error")
+                results[item["custom_id"]] = f"Erreur lors de l'appel à GPT: {error}"
+
+    for custom_id in expected_ids or ():
+        results.setdefault(custom_id, f"Erreur: aucune réponse pour la requête {custom_id} du lot {batch_id}")
+    return results
+
+
+def submit_summary_batch(
+    text: str,
+    api_key: str,
+    gpt_model: str = "gpt-3.5-turbo",
+    temperature: float = 0.7,
+    style: str = "bullet"
+) -> Tuple[str, int]:
+    """
+    Soumet les résumés partiels d'un texte à l'API Batch (étape la plus
+    coûteuse du résumé: un appel par morceau de texte).
+
+    Returns:
+        (identifiant du lot, nombre de morceaux), à passer à collect_summary_batch
+    """
+    text = text.encode('utf-8', errors='replace').decode('utf-8')
+    prompts = partial_summary_prompts(chunk_text(text, max_tokens=SUMMARY_CHUNK_TOKENS, model=gpt_model), style)
+    batch_id = submit_batch(
+        [chat_batch_request(f"chunk-{i}", prompt, gpt_model, temperature) for i, prompt in enumerate(prompts)],
+        api_key
+    )
+    return batch_id, len(prompts)
+
+
+def collect_summary_batch(
+    batch_id: str,
+    api_key: str,
+    chunk_count: int,
+    gpt_model: str = "gpt-3.5-turbo",
+    temperature: float = 0.7,
+    style: str = "bullet"
+) -> Optional[str]:
+    """
+    Termine un résumé soumis par submit_summary_batch: une fois le lot traité,
+    les résumés partiels sont fusionnés directement (peu d'appels). Si un seul
+    morceau manque ou a échoué, aucun résumé n'est produit (il ne couvrirait
+    qu'une partie du texte).
+
+    Returns:
+        None si le lot est encore en cours, sinon le résumé final (ou un message "Erreur...")
+    """
+    chunk_ids = [f"chunk-{i}" for i in range(chunk_count)]
+    results = poll_batch(batch_id, api_key, expected_ids=chunk_ids)
+    if results is None:
+        return None
+
+    partials = [results[custom_id] for custom_id in chunk_ids]
+    for partial in partials:
+        if partial.startswith("Erreur"):
+            return partial
+
+    partials = reduce_summaries(partials, api_key, gpt_model, temperature, style)
+    return finalize_summary(partials, api_key, gpt_model, temperature, style)
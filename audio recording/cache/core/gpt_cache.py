@@ -0,0 +1,89 @@
+# core/gpt_cache.py
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+# Fichier SQLite des résultats GPT: par défaut dans le stockage local de
+# l'application (survit aux redémarrages et au nettoyage de /tmp)
+GPT_CACHE_PATH = os.getenv("GPT_CACHE_PATH")
+GPT_CACHE_DIR = "cache"
+GPT_CACHE_FILENAME = "gpt_cache.sqlite"
+
+
+class GPTResultCache:
+    """
+    Cache disque des résultats GPT (résumés, mots-clés, réponses), indexé par
+    une empreinte blake2b des paramètres de la requête. Une erreur d'accès au
+    fichier n'empêche jamais l'appel GPT: le cache se comporte alors comme vide.
+    """
+
+    def __init__(self, path: Optional[str] = GPT_CACHE_PATH):
+        """
+        Initialise le cache.
+
+        Args:
+            path: Chemin du fichier SQLite (None: dossier "cache" du stockage local)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connection(self) -> sqlite3.Connection:
+        """Ouvre la base à la première utilisation (connexion partagée entre threads, protégée par le verrou)."""
+        if self._conn is None:
+            if self.path is None:
+                # Import différé: le gestionnaire de stockage se connecte à MinIO à l'import
+                from .storage_manager import storage_manager
+                self.path = os.path.join(storage_manager.get_local_dir(GPT_CACHE_DIR), GPT_CACHE_FILENAME)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS gpt_results "
+                "(key TEXT PRIMARY KEY, created_at REAL NOT NULL, result TEXT NOT NULL)"
+            )
+        return self._conn
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        """Réduit les paramètres d'une requête GPT à une empreinte blake2b hexadécimale."""
+        return hashlib.blake2b("\x1f".join(map(str, parts)).encode("utf-8"), digest_size=16).hexdigest()
+
+    def get(self, key: str, ttl: float) -> Optional[str]:
+        """
+        Renvoie le résultat mémorisé s'il a moins de `ttl` secondes, sinon None.
+        """
+        try:
+            with self._lock:
+                row = self._connection().execute(
+                    "SELECT created_at, result FROM gpt_results WHERE key = ?", (key,)
+                ).fetchone()
+        except (sqlite3.Error, OSError) as e:
+            logging.warning(f"Lecture du cache GPT impossible: {str(e)}")
+            return None
+
+        if row and time.time() - row[0] < ttl:
+            return row[1]
+        return None
+
+    def set(self, key: str, result: str, ttl: float) -> None:
+        """
+        Mémorise un résultat et supprime les entrées de plus de `ttl` secondes.
+        """
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connection()
+                with conn:
+                    conn.execute("DELETE FROM gpt_results WHERE created_at < ?", (now - ttl,))
+                    conn.execute(
+                        "INSERT OR REPLACE INTO gpt_results (key, created_at, result) VALUES (?, ?, ?)",
+                        (key, now, result)
+                    )
+        except (sqlite3.Error, OSError) as e:
+            logging.warning(f"Écriture du cache GPT impossible: {str(e)}")
+
+
+gpt_result_cache = GPTResultCache()
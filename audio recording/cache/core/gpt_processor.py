@@ -1,8 +1,54 @@
 # core/gpt_processor.py
+import asyncio
+import atexit
+import json
 import logging
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional
+import httpx
 from openai import OpenAI
+from .openai_parallel import run_parallel, HTTP2_AVAILABLE, OPENAI_LIMITS, OPENAI_MAX_RETRIES, OPENAI_TIMEOUT
 from .utils import chunk_text
 
+# Résumé long: longueur totale visée pour les résumés partiels (répartie entre
+# les morceaux), longueur minimale d'un résumé partiel, taille maximale de
+# l'entrée de la fusion finale, et nombre de résumés fusionnés par appel
+SUMMARY_TARGET_WORDS = 600
+MIN_PARTIAL_SUMMARY_WORDS = 80
+MERGE_BUDGET_WORDS = 2000
+MERGE_GROUP_SIZE = 5
+
+# Taille maximale (en tokens du modèle) d'un morceau de texte à résumer
+SUMMARY_CHUNK_TOKENS = 700
+
+# Taille maximale (en tokens) d'un morceau de texte pour l'extraction de mots-clés
+KEYWORDS_CHUNK_TOKENS = 3000
+
+
+@lru_cache(maxsize=1)
+def get_http_client() -> httpx.Client:
+    """
+    Client HTTP partagé par tous les clients OpenAI du processus: le pool de
+    connexions évite de refaire DNS + TLS à chaque appel GPT ou TTS (HTTP/2
+    si le paquet h2 est installé).
+    """
+    client = httpx.Client(
+        transport=httpx.HTTPTransport(retries=3, http2=HTTP2_AVAILABLE, limits=OPENAI_LIMITS),
+        timeout=OPENAI_TIMEOUT,
+    )
+    # Fermer proprement les connexions à l'arrêt du processus
+    atexit.register(client.close)
+    return client
+
+
+@lru_cache(maxsize=4)
+def get_openai_client(api_key: str) -> OpenAI:
+    """
+    Client OpenAI réutilisé pour une clé API donnée (quelques clés au plus par
+    processus), adossé au client HTTP partagé.
+    """
+    return OpenAI(api_key=api_key, http_client=get_http_client(), max_retries=OPENAI_MAX_RETRIES)
+
 
 def gpt_request(prompt: str, api_key: str, model: str = "gpt-3.5-turbo", temperature: float = 0.7):
     """
@@ -16,7 +62,7 @@ def gpt_request(prompt: str, api_key: str, model: str = "gpt-3.5-turbo", tempera
         prompt = prompt.encode('utf-8', errors='replace').decode('utf-8')
 
     try:
-        client = OpenAI(api_key=api_key)
+        client = get_openai_client(api_key)
 
         # S'assurer que le texte est correctement encodé pour l'API
         if isinstance(prompt, str):
@@ -35,6 +81,145 @@ def gpt_request(prompt: str, api_key: str, model: str = "gpt-3.5-turbo", tempera
         logging.error(f"Erreur lors de l'appel à GPT: {str(e)}")
         return f"Erreur lors de l'appel à GPT: {str(e)}"
 
+def gpt_requests_parallel(prompts: List[str], api_key: str, model: str = "gpt-3.5-turbo",
+                          temperature: float = 0.7) -> List[str]:
+    """
+    Envoie plusieurs prompts simultanément, dans les limites de débit du compte
+    (voir core/openai_parallel.py), et renvoie les réponses dans l'ordre des
+    prompts. Comme pour gpt_request, une erreur est renvoyée sous forme de
+    texte "Erreur...".
+    """
+    if not api_key:
+        return ["Erreur: Clé API OpenAI manquante."] * len(prompts)
+
+    return asyncio.run(run_parallel(prompts, api_key, model=model, temperature=temperature))
+
+
+def gpt_request_stream(prompt: str, api_key: str, model: str = "gpt-3.5-turbo",
+                       temperature: float = 0.7) -> Iterator[str]:
+    """
+    Comme gpt_request, mais renvoie la réponse morceau par morceau (stream=True).
+    Les erreurs d'API sont levées au lieu d'être renvoyées sous forme de texte.
+    """
+    if not api_key:
+        raise ValueError("Clé API OpenAI manquante.")
+
+    # S'assurer que le texte est en UTF-8
+    prompt = prompt.encode('utf-8', errors='replace').decode('utf-8')
+
+    client = get_openai_client(api_key)
+    stream = client.chat.completions.create(
+        model=model,
+        messages=[
+            {"role": "user", "content": prompt},
+        ],
+        temperature=temperature,
+        stream=True,
+    )
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
+def _word_limit(max_words: Optional[int]) -> str:
+    """Consigne de longueur ajoutée aux prompts de résumé (vide si pas de limite)."""
+    return f"Utilise au plus {max_words} mots.\n\n" if max_words else ""
+
+
+def build_summary_prompt(chunk: str, style: str = "bullet", max_words: Optional[int] = None) -> str:
+    """
+    Construit le prompt de résumé d'un morceau de texte selon le style,
+    avec une longueur cible optionnelle (en mots).
+    """
+    if style == "bullet":
+        return (
+            "Résume le texte suivant de manière concise, sous forme de liste à puces :\n\n"
+            f"{_word_limit(max_words)}{chunk}"
+        )
+    elif style == "concise":
+        return (
+            "Fais un résumé très concis (quelques phrases seulement) du texte suivant :\n\n"
+            f"{_word_limit(max_words)}{chunk}"
+        )
+    else:  # "detailed"
+        return (
+            "Voici le prompt utilisateur:"f"{style},{_word_limit(max_words)}{chunk}"
+        )
+
+
+def build_summary_merge_prompt(partial_summaries: list, style: str = "bullet",
+                               max_words: Optional[int] = None) -> str:
+    """
+    Construit le prompt qui fusionne plusieurs résumés partiels,
+    avec une longueur cible optionnelle (en mots).
+    """
+    combined_text = "\n\n".join(partial_summaries)
+    return (
+        "Voici plusieurs résumés partiels. Combine-les en un seul résumé "
+        f"({style} si possible) :\n\n{_word_limit(max_words)}{combined_text}"
+    )
+
+
+def map_reduce_summaries(
+    chunks: List[str],
+    api_key: str,
+    gpt_model: str = "gpt-3.5-turbo",
+    temperature: float = 0.7,
+    style: str = "bullet"
+) -> List[str]:
+    """
+    Résume les morceaux en parallèle puis réduit les résumés partiels jusqu'à
+    ce que la fusion finale tienne dans MERGE_BUDGET_WORDS mots.
+
+    Chacun des k morceaux vise SUMMARY_TARGET_WORDS / k mots, pour que
+    l'entrée de la fusion reste bornée quelle que soit la longueur du texte.
+    Tant qu'elle dépasse le budget, les résumés sont fusionnés par groupes de
+    MERGE_GROUP_SIZE (chaque niveau de l'arbre en parallèle).
+
+    Returns:
+        Résumés restants: un seul si le texte tient en un morceau ou si la
+        réduction a tout fusionné, sinon plusieurs, à fusionner une dernière fois
+    """
+    partials = gpt_requests_parallel(
+        partial_summary_prompts(chunks, style), api_key, model=gpt_model, temperature=temperature
+    )
+    return reduce_summaries(partials, api_key, gpt_model, temperature, style)
+
+
+def partial_summary_prompts(chunks: List[str], style: str = "bullet") -> List[str]:
+    """
+    Prompts de résumé des morceaux: chacun des k morceaux vise
+    SUMMARY_TARGET_WORDS / k mots (pas de limite si le texte tient en un morceau).
+    """
+    if len(chunks) == 1:
+        return [build_summary_prompt(chunks[0], style)]
+
+    target_words = max(SUMMARY_TARGET_WORDS // len(chunks), MIN_PARTIAL_SUMMARY_WORDS)
+    return [build_summary_prompt(chunk, style, target_words) for chunk in chunks]
+
+
+def reduce_summaries(
+    partials: List[str],
+    api_key: str,
+    gpt_model: str = "gpt-3.5-turbo",
+    temperature: float = 0.7,
+    style: str = "bullet"
+) -> List[str]:
+    """
+    Fusionne les résumés partiels par groupes de MERGE_GROUP_SIZE, niveau par
+    niveau, tant que leur total dépasse MERGE_BUDGET_WORDS mots.
+    """
+    while len(partials) > 1 and sum(len(p.split()) for p in partials) > MERGE_BUDGET_WORDS:
+        groups = [partials[i:i + MERGE_GROUP_SIZE] for i in range(0, len(partials), MERGE_GROUP_SIZE)]
+        target_words = max(SUMMARY_TARGET_WORDS // len(groups), MIN_PARTIAL_SUMMARY_WORDS)
+        partials = gpt_requests_parallel(
+            [build_summary_merge_prompt(group, style, target_words) for group in groups],
+            api_key, model=gpt_model, temperature=temperature
+        )
+
+    return partials
+
+
 def summarize_text(
     text: str,
     api_key: str,
@@ -44,58 +229,167 @@ def summarize_text(
 ) -> str:
     """
     Résume un texte via GPT, avec support du 'style' (bullet, concise, detailed).
-    Gère le 'chunking' si le texte est trop long.
+    Gère le 'chunking' si le texte est trop long (voir map_reduce_summaries).
     """
     if not text:
         return "Erreur: Le texte à résumer est vide."
 
-    chunks = chunk_text(text, max_chars=2500)
-    partial_summaries = []
-
-    for chunk in chunks:
-        if style == "bullet":
-            user_prompt = (
-                "Résume le texte suivant de manière concise, sous forme de liste à puces :\n\n"
-                f"{chunk}"
-            )
-        elif style == "concise":
-            user_prompt = (
-                "Fais un résumé très concis (quelques phrases seulement) du texte suivant :\n\n"
-                f"{chunk}"
-            )
-        else:  # "detailed"
-            user_prompt = (
-                "Voici le prompt utilisateur:"f"{style},{chunk}"
-            )
-
-        part_summary = gpt_request(user_prompt, api_key, model=gpt_model, temperature=temperature)
-        partial_summaries.append(part_summary)
+    partial_summaries = map_reduce_summaries(
+        chunk_text(text, max_tokens=SUMMARY_CHUNK_TOKENS, model=gpt_model), api_key, gpt_model, temperature, style
+    )
+    return finalize_summary(partial_summaries, api_key, gpt_model, temperature, style)
 
+
+def finalize_summary(
+    partial_summaries: List[str],
+    api_key: str,
+    gpt_model: str = "gpt-3.5-turbo",
+    temperature: float = 0.7,
+    style: str = "bullet"
+) -> str:
+    """
+    Renvoie le résumé final: le résumé unique tel quel, sinon la fusion des résumés restants.
+    """
     if len(partial_summaries) == 1:
         return partial_summaries[0]
     else:
-        combined_text = "\n\n".join(partial_summaries)
-        combine_prompt = (
-            "Voici plusieurs résumés partiels. Combine-les en un seul résumé "
-            f"({style} si possible) :\n\n{combined_text}"
-        )
+        combine_prompt = build_summary_merge_prompt(partial_summaries, style)
         return gpt_request(combine_prompt, api_key, model=gpt_model, temperature=temperature)
 
 
-def extract_keywords(text: str, api_key: str, model: str = "gpt-3.5-turbo") -> str:
+def summarize_text_stream(
+    text: str,
+    api_key: str,
+    gpt_model: str = "gpt-3.5-turbo",
+    temperature: float = 0.7,
+    style: str = "bullet"
+) -> Iterator[str]:
     """
-    Extrait des mots-clés (keywords) du texte via GPT.
+    Comme summarize_text, mais renvoie le résumé final morceau par morceau.
+    Pour un texte long, les résumés partiels sont d'abord générés normalement
+    et seule leur fusion est diffusée en continu.
     """
     if not text:
-        return "Erreur: Le texte est vide."
+        raise ValueError("Le texte à résumer est vide.")
 
-    prompt = (
+    chunks = chunk_text(text, max_tokens=SUMMARY_CHUNK_TOKENS, model=gpt_model)
+    if len(chunks) == 1:
+        final_prompt = build_summary_prompt(chunks[0], style)
+    else:
+        partial_summaries = map_reduce_summaries(chunks, api_key, gpt_model, temperature, style)
+        if len(partial_summaries) == 1:
+            # La réduction a déjà tout fusionné
+            yield partial_summaries[0]
+            return
+        final_prompt = build_summary_merge_prompt(partial_summaries, style)
+
+    yield from gpt_request_stream(final_prompt, api_key, model=gpt_model, temperature=temperature)
+
+
+def build_keywords_prompt(text: str) -> str:
+    """
+    Construit le prompt d'extraction de mots-clés.
+    """
+    return (
         "Extrait les mots-clés les plus importants du texte ci-dessous, "
         "en français si le texte est en français, en anglais sinon. "
         "Retourne-les sous forme de liste, séparés par des virgules.\n\n"
         f"{text}"
     )
-    return gpt_request(prompt, api_key, model=model)
+
+
+def build_keywords_merge_prompt(partial_keywords: List[str]) -> str:
+    """
+    Construit le prompt de fusion des mots-clés extraits de chaque morceau d'un texte long.
+    """
+    lists = "\n".join(f"- {keywords}" for keywords in partial_keywords)
+    return (
+        "Voici des listes de mots-clés extraites des parties successives d'un même texte. "
+        "Fusionne-les en une seule liste sans doublons, en gardant les plus importants. "
+        "Retourne-les séparés par des virgules.\n\n"
+        f"{lists}"
+    )
+
+
+def build_combined_prompt(text: str, style: str = "bullet") -> str:
+    """
+    Construit un prompt unique pour le résumé et les mots-clés d'un texte
+    court: le texte n'est envoyé (et facturé) qu'une fois, la réponse est un
+    objet JSON {"summary", "keywords"}.
+    """
+    return (
+        "Réalise les deux tâches ci-dessous sur le texte qui suit, puis renvoie uniquement "
+        "un objet JSON avec les clés \"summary\" et \"keywords\" (chaînes de caractères).\n\n"
+        f"Tâche \"summary\": {build_summary_prompt('', style).strip()}\n\n"
+        f"Tâche \"keywords\": {build_keywords_prompt('').strip()}\n\n"
+        f"Texte :\n\n{text}"
+    )
+
+
+def combined_analysis(text: str, api_key: str, model: str = "gpt-3.5-turbo",
+                      temperature: float = 0.7, style: str = "bullet") -> Optional[Dict[str, str]]:
+    """
+    Génère le résumé et les mots-clés d'un texte court en un seul appel GPT
+    (mode JSON).
+
+    Returns:
+        {"summary", "keywords"}, ou None si la réponse est inexploitable
+        (modèle sans mode JSON, réponse tronquée...): l'appelant repasse
+        alors par les prompts séparés
+    """
+    try:
+        client = get_openai_client(api_key)
+        prompt = build_combined_prompt(text, style).encode('utf-8', errors='replace').decode('utf-8')
+        response = client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=temperature,
+            response_format={"type": "json_object"},
+        )
+        answers = json.loads(response.choices[0].message.content)
+    except Exception as e:
+        logging.warning(f"Résumé et mots-clés combinés non exploitables, appels séparés: {str(e)}")
+        return None
+
+    if not isinstance(answers, dict):
+        return None
+    results = {key: answers.get(key) for key in ("summary", "keywords")}
+    if not all(isinstance(value, str) and value.strip() for value in results.values()):
+        return None
+    return {key: value.strip() for key, value in results.items()}
+
+
+def build_question_prompt(text: str, question: str) -> str:
+    """
+    Construit le prompt de question/réponse sur un texte.
+    """
+    return (
+        f"Voici un texte :\n\n{text}\n\n"
+        f"Question : {question}\n\n"
+        "Réponds de manière concise et précise, en te basant uniquement sur le texte."
+    )
+
+
+def extract_keywords(text: str, api_key: str, model: str = "gpt-3.5-turbo") -> str:
+    """
+    Extrait des mots-clés (keywords) du texte via GPT.
+    Lève ValueError si le texte est vide.
+    """
+    if not text:
+        raise ValueError("Le texte est vide.")
+
+    # Texte long: mots-clés de chaque morceau en parallèle, puis fusion
+    chunks = chunk_text(text, max_tokens=KEYWORDS_CHUNK_TOKENS, model=model)
+    if len(chunks) == 1:
+        return gpt_request(build_keywords_prompt(text), api_key, model=model)
+
+    partial_keywords = gpt_requests_parallel(
+        [build_keywords_prompt(chunk) for chunk in chunks], api_key, model=model
+    )
+    for keywords in partial_keywords:
+        if keywords.startswith("Erreur"):
+            return keywords
+    return gpt_request(build_keywords_merge_prompt(partial_keywords), api_key, model=model)
 
 
 def ask_question_about_text(text: str, question: str, api_key: str, model: str = "gpt-3.5-turbo") -> str:
@@ -107,9 +401,4 @@ def ask_question_about_text(text: str, question: str, api_key: str, model: str =
     if not question.strip():
         return "Erreur: La question est vide."
 
-    prompt = (
-        f"Voici un texte :\n\n{text}\n\n"
-        f"Question : {question}\n\n"
-        "Réponds de manière concise et précise, en te basant uniquement sur le texte."
-    )
-    return gpt_request(prompt, api_key, model=model)
+    return gpt_request(build_question_prompt(text, question), api_key, model=model)
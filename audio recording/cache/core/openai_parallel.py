@@ -0,0 +1,201 @@
+# core/openai_parallel.py
+import asyncio
+import hashlib
+import logging
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+from openai import AsyncOpenAI, APIConnectionError, APIStatusError, APITimeoutError, RateLimitError
+
+from .utils import get_encoding
+
+try:
+    import h2  # noqa: F401  (HTTP/2 de httpx, paquet httpx[http2])
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Délais des appels OpenAI: un appel bloqué échoue au lieu de geler la page
+OPENAI_TIMEOUT = httpx.Timeout(connect=5.0, read=60.0, write=10.0, pool=5.0)
+OPENAI_MAX_RETRIES = 2
+OPENAI_LIMITS = httpx.Limits(max_connections=40, max_keepalive_connections=20)
+
+# Nombre maximal de requêtes GPT simultanées, quelles que soient les limites du compte
+MAX_CONCURRENT_REQUESTS = 10
+
+# Limites utilisées tant qu'aucune réponse n'a renvoyé les en-têtes x-ratelimit-*
+DEFAULT_RPM = 500
+DEFAULT_TPM = 60000
+
+# Tokens de réponse réservés par requête en plus du prompt
+COMPLETION_TOKENS_ESTIMATE = 500
+
+# Délai de base (secondes) du backoff exponentiel entre deux tentatives
+RETRY_BASE_DELAY = 1.0
+
+# Limites (rpm, tpm) lues dans les réponses de l'API, par empreinte de clé API et modèle
+_known_limits: Dict[Tuple[str, str], Tuple[float, float]] = {}
+
+
+def estimate_tokens(prompt: str, model: str) -> int:
+    """
+    Estime le nombre de tokens d'un prompt (tiktoken si disponible, sinon ~4 caractères par token).
+    """
+    encoding = get_encoding(model)
+    if encoding is not None:
+        return len(encoding.encode(prompt))
+    return len(prompt) // 4 + 1
+
+
+class CapacityTracker:
+    """
+    Seaux à fuite pour les requêtes et les tokens par minute: la capacité se
+    reconstitue en continu et chaque requête attend d'avoir la sienne.
+    """
+
+    def __init__(self, rpm: float, tpm: float):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.available_request_capacity = rpm
+        self.available_token_capacity = tpm
+        self.last_update = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def update_limits(self, rpm: float, tpm: float) -> None:
+        """Applique de nouvelles limites; une hausse est disponible immédiatement."""
+        self.available_request_capacity = min(self.available_request_capacity + max(rpm - self.rpm, 0), rpm)
+        self.available_token_capacity = min(self.available_token_capacity + max(tpm - self.tpm, 0), tpm)
+        self.rpm = rpm
+        self.tpm = tpm
+
+    def _replenish(self) -> None:
+        """Ajoute la capacité accumulée depuis la dernière mise à jour."""
+        now = time.monotonic()
+        elapsed = now - self.last_update
+        self.available_request_capacity = min(self.available_request_capacity + self.rpm * elapsed / 60, self.rpm)
+        self.available_token_capacity = min(self.available_token_capacity + self.tpm * elapsed / 60, self.tpm)
+        self.last_update = now
+
+    async def acquire(self, tokens: int) -> None:
+        """Attend qu'une requête de `tokens` tokens puisse partir, puis la décompte."""
+        # Une requête plus grosse que la limite par minute ne passerait jamais
+        tokens = min(tokens, self.tpm)
+        async with self._lock:
+            while True:
+                self._replenish()
+                if self.available_request_capacity >= 1 and self.available_token_capacity >= tokens:
+                    self.available_request_capacity -= 1
+                    self.available_token_capacity -= tokens
+                    return
+                await asyncio.sleep(0.05)
+
+
+def _limits_key(api_key: str, model: str) -> Tuple[str, str]:
+    """Clé de _known_limits: la clé API n'est conservée que sous forme d'empreinte."""
+    return hashlib.blake2b(api_key.encode(), digest_size=8).hexdigest(), model
+
+
+def known_rate_limits(api_key: str, model: str) -> Tuple[float, float]:
+    """Limites RPM/TPM déjà lues pour cette clé API et ce modèle, sinon les valeurs par défaut."""
+    return _known_limits.get(_limits_key(api_key, model), (DEFAULT_RPM, DEFAULT_TPM))
+
+
+def record_rate_limits(api_key: str, model: str, headers) -> Optional[Tuple[float, float]]:
+    """
+    Mémorise les limites RPM/TPM annoncées par les en-têtes x-ratelimit-limit-*
+    d'une réponse de l'API (aucune requête supplémentaire n'est nécessaire).
+
+    Returns:
+        (rpm, tpm), ou None si les en-têtes sont absents ou illisibles
+    """
+    try:
+        limits = (
+            float(headers["x-ratelimit-limit-requests"]),
+            float(headers["x-ratelimit-limit-tokens"]),
+        )
+    except (KeyError, TypeError, ValueError):
+        return None
+
+    _known_limits[_limits_key(api_key, model)] = limits
+    return limits
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Erreurs temporaires: limite de débit, erreurs serveur 5xx, réseau, timeout."""
+    if isinstance(error, (RateLimitError, APIConnectionError, APITimeoutError)):
+        return True
+    return isinstance(error, APIStatusError) and error.status_code >= 500
+
+
+async def run_parallel(
+    prompts: List[str],
+    api_key: str,
+    model: str = "gpt-3.5-turbo",
+    rpm: Optional[float] = None,
+    tpm: Optional[float] = None,
+    max_attempts: int = 5,
+    temperature: float = 0.7
+) -> List[str]:
+    """
+    Envoie des prompts GPT en parallèle en respectant les limites de débit du
+    compte, avec nouvelles tentatives (backoff exponentiel) sur les erreurs
+    temporaires.
+
+    Args:
+        prompts: Prompts à envoyer
+        api_key: Clé API OpenAI
+        model: Modèle GPT à utiliser
+        rpm: Requêtes par minute autorisées (lues dans les réponses si None)
+        tpm: Tokens par minute autorisés (lus dans les réponses si None)
+        max_attempts: Nombre maximal de tentatives par prompt
+        temperature: Température de génération
+
+    Returns:
+        Réponses dans l'ordre des prompts; une erreur définitive est renvoyée
+        sous forme de texte "Erreur..."
+    """
+    # Les nouvelles tentatives sont gérées ici, pas par le SDK. Avec HTTP/2,
+    # les requêtes parallèles sont multiplexées sur une même connexion.
+    http_client = httpx.AsyncClient(http2=HTTP2_AVAILABLE, limits=OPENAI_LIMITS, timeout=OPENAI_TIMEOUT)
+    async with AsyncOpenAI(api_key=api_key, max_retries=0, http_client=http_client) as client:
+        # Limites inconnues: valeurs déjà lues (ou par défaut), corrigées dès la
+        # première réponse grâce à ses en-têtes x-ratelimit-*
+        learn_limits = rpm is None or tpm is None
+        if learn_limits:
+            known_rpm, known_tpm = known_rate_limits(api_key, model)
+            rpm = rpm or known_rpm
+            tpm = tpm or known_tpm
+
+        tracker = CapacityTracker(rpm, tpm)
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+
+        async def _request(prompt: str) -> str:
+            # S'assurer que le texte est en UTF-8
+            prompt = prompt.encode('utf-8', errors='replace').decode('utf-8')
+            token_cost = estimate_tokens(prompt, model) + COMPLETION_TOKENS_ESTIMATE
+
+            for attempt in range(max_attempts):
+                await tracker.acquire(token_cost)
+                try:
+                    async with semaphore:
+                        raw = await client.chat.completions.with_raw_response.create(
+                            model=model,
+                            messages=[
+                                {"role": "user", "content": prompt},
+                            ],
+                            temperature=temperature,
+                        )
+                    if learn_limits:
+                        limits = record_rate_limits(api_key, model, raw.headers)
+                        if limits:
+                            tracker.update_limits(*limits)
+                    return raw.parse().choices[0].message.content.strip()
+                except Exception as e:
+                    if not _is_retryable(e) or attempt == max_attempts - 1:
+                        logging.error(f"Erreur lors de l'appel à GPT: {str(e)}")
+                        return f"Erreur lors de l'appel à GPT: {str(e)}"
+                    await asyncio.sleep(RETRY_BASE_DELAY * 2 ** attempt + random.random())
+
+        return await asyncio.gather(*(_request(prompt) for prompt in prompts))
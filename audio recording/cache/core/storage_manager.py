@@ -23,6 +23,9 @@ AUDIO_BUCKET = "audio-files"
 TRANSCRIPTION_BUCKET = "transcriptions"
 EXPORT_BUCKET = "exports"
 
+# Dossier des données locales: stockage de secours sans MinIO et caches de l'application
+LOCAL_STORAGE_DIR = os.getenv("LOCAL_STORAGE_DIR", os.path.join(os.getcwd(), "local_storage"))
+
 
 
 
@@ -61,11 +64,20 @@ class StorageManager:
 
         # Créer un répertoire local pour le stockage si MinIO est désactivé
         if not self.use_minio:
-            self.local_storage_dir = os.path.join(os.getcwd(), "local_storage")
+            self.local_storage_dir = LOCAL_STORAGE_DIR
             for bucket in [AUDIO_BUCKET, TRANSCRIPTION_BUCKET, EXPORT_BUCKET]:
                 bucket_dir = os.path.join(self.local_storage_dir, bucket)
                 os.makedirs(bucket_dir, exist_ok=True)
 
+    def get_local_dir(self, name: str) -> str:
+        """
+        Renvoie un sous-dossier persistant du stockage local, créé au besoin.
+        Disponible même avec MinIO (fichiers de l'application comme les caches).
+        """
+        path = os.path.join(LOCAL_STORAGE_DIR, name)
+        os.makedirs(path, exist_ok=True)
+        return path
+
     def _ensure_buckets_exist(self):
         """S'assure que les buckets nécessaires existent"""
         if not self.use_minio:
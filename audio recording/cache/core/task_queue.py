@@ -1,7 +1,6 @@
 from celery import Celery
 import os
 import logging
-import whisper
 import time
 from .database import get_db, Transcription
 from .storage_manager import storage_manager
@@ -63,7 +62,9 @@ def transcribe_audio_task(audio_path, user_id, filename, whisper_model="base", t
 
         # Charger le modèle Whisper
         start_time = time.time()
-        model = whisper.load_model(whisper_model)
+        # Import local: core.transcription importe ce module
+        from .transcription import get_whisper_model
+        model = get_whisper_model(whisper_model)
 
         # Transcrire
         result = model.transcribe(
@@ -73,7 +74,7 @@ def transcribe_audio_task(audio_path, user_id, filename, whisper_model="base", t
             temperature=0.0,
             beam_size=5,
             best_of=5,
-            fp16=True,
+            fp16=model.device.type == "cuda",
         )
 
         transcription_text = result["text"]
@@ -1,68 +1,219 @@
 import ssl
+import asyncio
+import threading
 import whisper
+import torch
+import numpy as np
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Tuple
 from .task_queue import transcribe_audio_task
+from .utils import segments_to_columns
 import logging
 import subprocess
 import os
-def transcribe_or_translate_locally(
-        audio_file_path: str,
-        whisper_model: str = "base",
-        translate: bool = False,
-        progress_callback=None
-):
+
+try:
+    from faster_whisper import WhisperModel, BatchedInferencePipeline
+except ImportError:  # paquet optionnel, voir WHISPER_BACKEND
+    BatchedInferencePipeline = None
+
+
+# Nombre de modèles Whisper gardés en mémoire (les plus gros pèsent plusieurs Go)
+WHISPER_MODEL_CACHE_SIZE = 3
+
+# Modèles Whisper déjà chargés dans ce processus, par (nom, device), du moins au plus récent
+_whisper_models: "OrderedDict[Tuple[str, Optional[str]], Any]" = OrderedDict()
+_whisper_models_lock = threading.Lock()
+
+# faster-whisper: segments (découpés selon la voix) décodés par lots de cette
+# taille (à augmenter sur un GPU avec de la mémoire libre, à réduire sur CPU)
+WHISPER_BATCH_SIZE = int(os.getenv("WHISPER_BATCH_SIZE", "8"))
+BATCHED_BACKEND = "faster-whisper"
+
+# Moteur de transcription locale: "openai-whisper" (par défaut, modèle choisi
+# tel quel) ou "faster-whisper" (quantifié int8, décodage par lots; paquet
+# faster-whisper à installer séparément)
+WHISPER_BACKEND = os.getenv("WHISPER_BACKEND", "openai-whisper")
+
+
+def use_batched_backend() -> bool:
+    """Indique si la transcription locale passe par faster-whisper (WHISPER_BACKEND)."""
+    if WHISPER_BACKEND != BATCHED_BACKEND:
+        return False
+    if BatchedInferencePipeline is None:
+        logging.warning("WHISPER_BACKEND=faster-whisper mais le paquet faster-whisper n'est pas installé: "
+                        "utilisation d'openai-whisper")
+        return False
+    return True
+
+
+def is_whisper_model_loaded(whisper_model: str = "base", device: Optional[str] = None) -> bool:
+    """Indique si le modèle est déjà en mémoire (pas de temps de chargement à prévoir)."""
+    return (whisper_model, device) in _whisper_models
+
+
+def _cached_model(key: Tuple[str, Optional[str]], loader: Callable[[], Any]):
     """
-    Transcrit (ou traduit) un fichier audio localement avec Whisper.
-    Retourne { 'error', 'text', 'segments', 'language' }.
-    Gère l'erreur SSL si besoin.
+    Renvoie le modèle mémorisé sous cette clé, ou le charge une seule fois par
+    processus. Au-delà de WHISPER_MODEL_CACHE_SIZE modèles, le moins récemment
+    utilisé est libéré, ainsi que la mémoire GPU qu'il occupait (PyTorch la
+    garderait sinon réservée pour lui).
+    """
+    with _whisper_models_lock:
+        if key in _whisper_models:
+            _whisper_models.move_to_end(key)
+            return _whisper_models[key]
+
+        model = loader()
+        _whisper_models[key] = model
+        if len(_whisper_models) > WHISPER_MODEL_CACHE_SIZE:
+            _whisper_models.popitem(last=False)
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        return model
+
+
+def get_whisper_model(whisper_model: str = "base", device: Optional[str] = None):
     """
+    Renvoie le modèle Whisper demandé, chargé une seule fois par processus
+    (le chargement prend de 1 à 10 secondes selon la taille du modèle).
     """
-        Transcrit (ou traduit) un fichier audio localement avec Whisper.
-        """
-    # Ajouter des logs détaillés pour faciliter le débogage
-    logging.info(f"Début de transcription: fichier={audio_file_path}, modèle={whisper_model}, translate={translate}")
+    return _cached_model((whisper_model, device), lambda: whisper.load_model(whisper_model, device=device))
+
+
+def get_batched_whisper_pipeline(whisper_model: str = "base"):
+    """
+    Renvoie le pipeline faster-whisper du modèle demandé, chargé une seule fois
+    par processus (quantifié en int8, activations fp16 sur GPU). Sur CPU, tous
+    les cœurs sont utilisés (CTranslate2 se limite sinon à 4 threads).
+    """
+    def load():
+        on_gpu = torch.cuda.is_available()
+        model = WhisperModel(
+            whisper_model,
+            device="cuda" if on_gpu else "cpu",
+            compute_type="int8_float16" if on_gpu else "int8",
+            cpu_threads=os.cpu_count() or 0,
+        )
+        return BatchedInferencePipeline(model=model)
+
+    return _cached_model((whisper_model, BATCHED_BACKEND), load)
+
+
+def _transcribe_batched(pipeline, audio_file_path: str, translate: bool,
+                        progress_callback: Optional[Callable[[float, str], None]] = None) -> dict:
+    """
+    Transcrit avec faster-whisper: l'audio est découpé aux silences (VAD) et
+    les morceaux sont décodés par lots de WHISPER_BATCH_SIZE; les horodatages
+    des segments restent relatifs au début du fichier. La progression est
+    signalée à chaque segment produit, d'après sa fin dans l'audio.
+    Retourne { 'text', 'segments' (en colonnes), 'language' }.
+    """
+    segment_iter, info = pipeline.transcribe(
+        audio_file_path,
+        batch_size=WHISPER_BATCH_SIZE,
+        task="translate" if translate else "transcribe",
+        beam_size=3,
+        temperature=0.0,
+    )
+
+    segments = []
+    for seg in segment_iter:
+        segments.append(seg)
+        if progress_callback and info.duration:
+            done = min(seg.end / info.duration, 1.0)
+            progress_callback(0.15 + 0.8 * done, f"Transcription en cours... {done:.0%}")
+
+    texts = [seg.text for seg in segments]
+    return {
+        "text": "".join(texts).strip(),
+        "segments": {
+            "starts": np.fromiter((seg.start for seg in segments), dtype=np.float64, count=len(segments)),
+            "ends": np.fromiter((seg.end for seg in segments), dtype=np.float64, count=len(segments)),
+            "texts": texts,
+        },
+        "language": info.language,
+    }
+
+
+def _probe_audio(audio_file_path: str) -> str:
+    """
+    Vérifie que le fichier audio existe et que FFmpeg est disponible.
+    Retourne un message d'erreur, ou une chaîne vide si tout est prêt.
+    """
+    if not audio_file_path:
+        return "Erreur: Aucun fichier audio fourni"
 
     # Vérifier l'existence du fichier
     if not os.path.exists(audio_file_path):
-        error_msg = f"Fichier audio introuvable: {audio_file_path}"
-        logging.error(error_msg)
-        return {
-            "error": error_msg,
-            "text": "",
-            "segments": [],
-            "language": "",
-        }
+        return f"Fichier audio introuvable: {audio_file_path}"
 
     # Vérifier que ffmpeg est installé
     try:
         subprocess.run(["ffmpeg", "-version"], capture_output=True, check=True)
     except (subprocess.SubprocessError, FileNotFoundError):
-        error_msg = "FFmpeg n'est pas installé ou n'est pas accessible. FFmpeg est requis pour Whisper."
-        logging.error(error_msg)
-        return {
-            "error": error_msg,
-            "text": "",
-            "segments": [],
-            "language": "",
-        }
+        return "FFmpeg n'est pas installé ou n'est pas accessible. FFmpeg est requis pour Whisper."
 
-    if not audio_file_path:
-        return {
-            "error": "Erreur: Aucun fichier audio fourni",
-            "text": "",
-            "segments": [],
-            "language": "",
-        }
+    return ""
+
+
+async def transcribe_async(
+        audio_file_path: str,
+        whisper_model: str = "base",
+        translate: bool = False,
+        progress_callback=None
+):
+    """
+    Version asynchrone de transcribe_or_translate_locally: le chargement du
+    modèle et la vérification du fichier/FFmpeg s'exécutent en parallèle dans
+    des threads, puis la transcription tourne dans un thread sans bloquer la
+    boucle d'événements.
+    Retourne { 'error', 'text', 'segments', 'language' }.
+    """
+    # Ajouter des logs détaillés pour faciliter le débogage
+    logging.info(f"Début de transcription: fichier={audio_file_path}, modèle={whisper_model}, translate={translate}")
 
     try:
-        if progress_callback:
+        batched = use_batched_backend()
+        model_key = BATCHED_BACKEND if batched else None
+        if progress_callback and not is_whisper_model_loaded(whisper_model, model_key):
             progress_callback(0.05, f"Chargement du modèle Whisper '{whisper_model}'...")
 
-        model = whisper.load_model(whisper_model)
+        # Chargement du modèle et vérifications indépendantes en parallèle
+        model, probe_error = await asyncio.gather(
+            asyncio.to_thread(get_batched_whisper_pipeline if batched else get_whisper_model, whisper_model),
+            asyncio.to_thread(_probe_audio, audio_file_path),
+        )
+
+        if probe_error:
+            logging.error(probe_error)
+            return {
+                "error": probe_error,
+                "text": "",
+                "segments": [],
+                "language": "",
+            }
 
         if progress_callback:
             progress_callback(0.15, "Modèle chargé. Début de la transcription...")
 
-        result = model.transcribe(
+        if batched:
+            report = None
+            if progress_callback:
+                # Segments produits dans le thread de transcription; l'affichage
+                # se fait dans le thread de la boucle (celui du script Streamlit)
+                loop = asyncio.get_running_loop()
+
+                def report(progress: float, message: str) -> None:
+                    loop.call_soon_threadsafe(progress_callback, progress, message)
+
+            result = await asyncio.to_thread(_transcribe_batched, model, audio_file_path, translate, report)
+            if progress_callback:
+                progress_callback(1.0, "Transcription terminée.")
+            return {"error": "", **result}
+
+        result = await asyncio.to_thread(
+            model.transcribe,
             audio_file_path,
             verbose=True,
             task="translate" if translate else "transcribe",
@@ -70,21 +221,16 @@ def transcribe_or_translate_locally(
             temperature=0.0,
             beam_size=3,  # Réduit de 5 à 3
             best_of=3,  # Réduit de 5 à 3
-            fp16=False,  # Force fp32 pour CPU
+            fp16=model.device.type == "cuda",  # fp16 sur GPU, fp32 sur CPU (fp16 non supporté)
             condition_on_previous_text=False  # Désactive la conditionnalité qui consomme plus de mémoire
         )
 
         if progress_callback:
             progress_callback(0.8, "Analyse des segments en cours...")
 
-        segments_data = []
-        if "segments" in result and isinstance(result["segments"], list):
-            for seg in result["segments"]:
-                segments_data.append({
-                    "start": seg["start"],
-                    "end": seg["end"],
-                    "text": seg["text"]
-                })
+        # Segments en colonnes plutôt qu'une copie en liste de dictionnaires
+        raw_segments = result.get("segments")
+        segments_data = segments_to_columns(raw_segments if isinstance(raw_segments, list) else [])
 
         detected_lang = result.get("language", "inconnue")
 
@@ -125,6 +271,20 @@ def transcribe_or_translate_locally(
         }
 
 
+def transcribe_or_translate_locally(
+        audio_file_path: str,
+        whisper_model: str = "base",
+        translate: bool = False,
+        progress_callback=None
+):
+    """
+    Transcrit (ou traduit) un fichier audio localement avec Whisper.
+    Retourne { 'error', 'text', 'segments', 'language' }.
+    Gère l'erreur SSL si besoin.
+    """
+    return asyncio.run(transcribe_async(audio_file_path, whisper_model, translate, progress_callback))
+
+
 def request_transcription(audio_file_path, user_id, filename, whisper_model="base", translate=False):
     """
     Demande une transcription asynchrone
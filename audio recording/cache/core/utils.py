@@ -1,57 +1,215 @@
 # core/utils.py
 
+import hashlib
+import logging
 import os
 import tempfile
-from typing import List
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple, Union
 
-def chunk_text(text: str, max_chars: int = 2000) -> List[str]:
+import numpy as np
+
+try:
+    import tiktoken
+except ImportError:  # découpage en caractères si tiktoken n'est pas installé
+    tiktoken = None
+
+try:
+    import xxhash
+except ImportError:  # empreintes blake2b si xxhash n'est pas installé
+    xxhash = None
+
+# Fins de phrase et séparateurs où couper un texte de préférence
+SENTENCE_ENDS = (". ", "! ", "? ", "\n")
+
+# Nombre moyen de caractères par token, quand les tokens ne peuvent pas être comptés
+CHARS_PER_TOKEN = 4
+
+# Segments de transcription en colonnes: {"starts", "ends"} (float64) et {"texts"}
+SegmentColumns = Dict[str, Any]
+
+# Découpages en tokens conservés (le même texte est redécoupé à chaque changement de style)
+TOKEN_CACHE_SIZE = 64
+_token_offsets: "OrderedDict[Tuple[str, str], List[int]]" = OrderedDict()
+_token_offsets_lock = threading.Lock()
+
+
+def content_hasher():
+    """
+    Hacheur incrémental des clés de cache de contenu (audio, texte, segments):
+    xxh3 128 bits si xxhash est installé, plusieurs fois plus rapide que
+    blake2b sur des centaines de Mo, sinon blake2b de 16 octets. Les
+    empreintes ne servent qu'aux caches: pas besoin de résistance
+    cryptographique.
+    """
+    if xxhash is not None:
+        return xxhash.xxh3_128()
+    return hashlib.blake2b(digest_size=16)
+
+
+def content_digest(data) -> str:
+    """Empreinte hexadécimale d'un contenu (bytes ou vue mémoire), voir content_hasher."""
+    hasher = content_hasher()
+    hasher.update(data)
+    return hasher.hexdigest()
+
+
+@lru_cache(maxsize=8)
+def get_encoding(model: str):
+    """
+    Encodeur tiktoken d'un modèle (cl100k_base pour un modèle inconnu). Sa
+    construction charge la table BPE: il est créé une seule fois par modèle.
+
+    Renvoie None si tiktoken n'est pas installé ou si la table BPE ne peut pas
+    être chargée (téléchargement impossible hors ligne, proxy...): les
+    appelants comptent alors ~CHARS_PER_TOKEN caractères par token. L'échec
+    est mémorisé comme le reste, pour ne pas retenter le téléchargement à
+    chaque découpage.
+    """
+    if tiktoken is None:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logging.warning(f"Encodeur tiktoken indisponible pour {model}, découpage en caractères: {str(e)}")
+        return None
+
+
+def token_offsets(text: str, model: str) -> List[int]:
+    """
+    Position (en caractères) du début de chaque token du texte, mémorisée par
+    empreinte du texte et modèle.
+    """
+    key = (content_digest(text.encode("utf-8")), model)
+    with _token_offsets_lock:
+        if key in _token_offsets:
+            _token_offsets.move_to_end(key)
+            return _token_offsets[key]
+
+    encoding = get_encoding(model)
+    decoded, offsets = encoding.decode_with_offsets(encoding.encode(text))
+    if decoded != text:  # décalages inexploitables (texte non normalisé)
+        offsets = list(range(0, len(text), CHARS_PER_TOKEN))
+
+    with _token_offsets_lock:
+        _token_offsets[key] = offsets
+        if len(_token_offsets) > TOKEN_CACHE_SIZE:
+            _token_offsets.popitem(last=False)
+    return offsets
+
+
+def _aligned_end(text: str, start: int, end: int) -> int:
     """
-    Découpe un texte trop long en chunks ~max_chars caractères chacun.
+    Recule la fin d'un morceau [start, end) jusqu'à une fin de phrase, sinon un
+    espace, pour ne pas couper un mot. Une coupure qui réduirait le morceau de
+    plus de moitié est ignorée.
     """
+    if end >= len(text):
+        return len(text)
+
+    floor = start + (end - start) // 2
+    sentence_end = max(
+        (pos + len(sep) for sep in SENTENCE_ENDS for pos in (text.rfind(sep, start, end),) if pos >= 0),
+        default=-1
+    )
+    if sentence_end > floor:
+        return sentence_end
+
+    space = text.rfind(" ", start, end)
+    if space > start:
+        return space + 1
+    return end
+
+
+def chunk_text(text: str, max_chars: int = 2000, max_tokens: Optional[int] = None,
+               model: str = "gpt-3.5-turbo") -> List[str]:
+    """
+    Découpe un texte trop long en chunks d'au plus max_chars caractères
+    (ou max_tokens tokens du modèle si précisé), coupés de préférence en fin
+    de phrase ou entre deux mots.
+    """
+    if max_chars <= 0 or (max_tokens is not None and max_tokens <= 0):
+        raise ValueError("La taille maximale d'un chunk doit être positive.")
+
+    if max_tokens is not None and get_encoding(model) is None:
+        max_chars, max_tokens = max_tokens * CHARS_PER_TOKEN, None
+
+    if max_tokens is None:
+        boundaries = None
+        window = max_chars
+    else:
+        boundaries = token_offsets(text, model)
+        window = max_tokens
+
     chunks = []
-    current_pos = 0
-    while current_pos < len(text):
-        chunk = text[current_pos: current_pos + max_chars]
-        chunks.append(chunk)
-        current_pos += max_chars
+    start = 0
+    while start < len(text):
+        if boundaries is None:
+            end = start + window
+        else:
+            first = bisect_left(boundaries, start)
+            end = boundaries[first + window] if first + window < len(boundaries) else len(text)
+            # Plusieurs tokens peuvent partager une position (caractère multi-octets)
+            end = max(end, start + 1)
+        end = _aligned_end(text, start, end)
+        chunks.append(text[start:end])
+        start = end
     return chunks
 
 
-def create_chapters_from_segments(segments: List[dict], chunk_duration: float = 60.0) -> List[str]:
+def segments_to_columns(segments: List[dict]) -> SegmentColumns:
+    """
+    Convertit des segments Whisper (liste de dictionnaires) en colonnes: deux
+    tableaux float64 pour les débuts et fins, une liste pour les textes.
+    """
+    return {
+        "starts": np.fromiter((seg["start"] for seg in segments), dtype=np.float64, count=len(segments)),
+        "ends": np.fromiter((seg["end"] for seg in segments), dtype=np.float64, count=len(segments)),
+        "texts": [seg["text"] for seg in segments],
+    }
+
+
+def segment_columns(segments: Union[SegmentColumns, List[dict]]) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+    """
+    Débuts, fins et textes des segments, qu'ils soient en colonnes ou sous
+    forme de liste de dictionnaires (sessions ouvertes avant le passage en colonnes).
+    """
+    if isinstance(segments, dict):
+        return segments["starts"], segments["ends"], segments["texts"]
+    columns = segments_to_columns(segments or [])
+    return columns["starts"], columns["ends"], columns["texts"]
+
+
+def create_chapters_from_segments(segments: Union[SegmentColumns, List[dict]],
+                                  chunk_duration: float = 60.0) -> List[str]:
     """
     Regroupe les segments en chapitres toutes les X secondes.
+    Un chapitre commence au premier segment situé au moins chunk_duration
+    secondes après le début du précédent; cette limite est trouvée par
+    recherche dichotomique dans les débuts de segments (triés).
     """
-    if not segments:
-        return []
+    starts, _, texts = segment_columns(segments)
     chapters = []
     current_start = 0.0
-    chapter_texts = []
-    chapter_index = 1
-
-    for seg in segments:
-        seg_start = seg["start"]
-        seg_text = seg["text"]
-
-        if seg_start - current_start >= chunk_duration and chapter_texts:
-            start_min = int(current_start // 60)
-            start_sec = int(current_start % 60)
-            chapters.append(
-                f"[Chapitre {chapter_index}] à {start_min:02d}:{start_sec:02d} => "
-                + " ".join(chapter_texts)
-            )
-            chapter_index += 1
-            chapter_texts = []
-            current_start = seg_start
-
-        chapter_texts.append(seg_text)
-
-    if chapter_texts:
+    first = 0
+
+    while first < len(texts):
+        last = max(first + 1, int(np.searchsorted(starts, current_start + chunk_duration, side="left")))
         start_min = int(current_start // 60)
         start_sec = int(current_start % 60)
         chapters.append(
-            f"[Chapitre {chapter_index}] à {start_min:02d}:{start_sec:02d} => "
-            + " ".join(chapter_texts)
+            f"[Chapitre {len(chapters) + 1}] à {start_min:02d}:{start_sec:02d} => "
+            + " ".join(texts[first:last])
         )
+        if last < len(texts):
+            current_start = float(starts[last])
+        first = last
 
     return chapters
 
@@ -59,6 +217,7 @@ def create_chapters_from_segments(segments: List[dict], chunk_duration: float =
 def export_text_file(text: str, output_folder: str, filename: str = "transcription.txt") -> str:
     """
     Enregistre le texte dans un fichier .txt dans output_folder (ou tmp si vide).
+    Le texte est encodé une seule fois puis écrit en binaire avec un tampon de 1 Mo.
     Retourne le chemin complet du fichier.
     """
     if not text:
@@ -70,6 +229,6 @@ def export_text_file(text: str, output_folder: str, filename: str = "transcripti
         output_folder = tempfile.gettempdir()
 
     out_path = os.path.join(output_folder, filename)
-    with open(out_path, "w", encoding="utf-8") as f:
-        f.write(text)
+    with open(out_path, "wb", buffering=1 << 20) as f:
+        f.write(text.encode("utf-8"))
     return out_path
@@ -1,27 +1,40 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import time
-import random
 from datetime import datetime, timedelta
 import os
 import logging
 
-from flask_login import user_logged_in
-
 from core.session_manager import get_session_value, set_session_value
 
+# Métriques d'utilisation suivies par le dashboard
+SUMMARY_METRICS = ['transcriptions', 'youtube_extractions', 'video_extractions', 'tts_generations']
+
+# Données fictives: bornes de la valeur initiale (haute exclue) et diviseurs
+# de croissance journalière de chaque métrique, dans l'ordre de SUMMARY_METRICS
+MOCK_BASE_LOW = np.array([5, 3, 2, 1])
+MOCK_BASE_HIGH = np.array([21, 16, 11, 9])
+MOCK_GROWTH_DIVISORS = np.array([100, 150, 200, 180])
+
 
 # Génération de données fictives pour le dashboard
-def generate_mock_data():
+@st.cache_data(ttl=86400, show_spinner=False)
+def generate_mock_data(seed_date: str):
     """
     Génère des données fictives pour le dashboard.
     Utilise un seed basé sur la date pour générer des données cohérentes
-    mais qui évoluent chaque jour.
+    mais qui évoluent chaque jour (résultat mis en cache pour la journée).
+
+    Args:
+        seed_date: Date du jour au format AAAA-MM-JJ
+
+    Returns:
+        DataFrame des 31 derniers jours
     """
     # Seed basé sur la date (change chaque jour)
-    today = datetime.now().date()
-    seed = int(today.strftime("%Y%m%d"))
-    random.seed(seed)
+    today = datetime.strptime(seed_date, "%Y-%m-%d").date()
+    rng = np.random.default_rng(int(today.strftime("%Y%m%d")))
 
     # Date de début (30 jours en arrière)
     start_date = today - timedelta(days=30)
@@ -29,28 +42,14 @@ def generate_mock_data():
     # Création des dates
     dates = [start_date + timedelta(days=i) for i in range(31)]
 
-    # Génération des métriques
-    transcription_counts = [random.randint(5, 20) for _ in range(31)]
-    youtube_extractions = [random.randint(3, 15) for _ in range(31)]
-    video_extractions = [random.randint(2, 10) for _ in range(31)]
-    tts_generations = [random.randint(1, 8) for _ in range(31)]
-
-    # Ajout d'une tendance (croissance progressive)
-    for i in range(1, 31):
-        growth_factor = 1 + (i / 100)
-        transcription_counts[i] = int(transcription_counts[i - 1] * growth_factor)
-        youtube_extractions[i] = int(youtube_extractions[i - 1] * (1 + (i / 150)))
-        video_extractions[i] = int(video_extractions[i - 1] * (1 + (i / 200)))
-        tts_generations[i] = int(tts_generations[i - 1] * (1 + (i / 180)))
+    # Valeur initiale aléatoire de chaque métrique (un seul tirage), puis
+    # tendance (croissance progressive) calculée pour les 31 jours d'un coup
+    base = rng.integers(MOCK_BASE_LOW, MOCK_BASE_HIGH)
+    growth = np.cumprod(1 + np.arange(31)[:, None] / MOCK_GROWTH_DIVISORS, axis=0)
 
     # Création du DataFrame
-    df = pd.DataFrame({
-        'date': dates,
-        'transcriptions': transcription_counts,
-        'youtube_extractions': youtube_extractions,
-        'video_extractions': video_extractions,
-        'tts_generations': tts_generations
-    })
+    df = pd.DataFrame((base * growth).astype(int), columns=SUMMARY_METRICS)
+    df.insert(0, 'date', dates)
 
     return df
 
@@ -61,16 +60,14 @@ def get_user_usage_metrics(user_id):
     """
     from core.database import UserActivity, get_db
     from sqlalchemy import func, and_, or_
-    import pandas as pd
-    import datetime
 
     try:
         db = next(get_db())
 
         # Date de début (30 jours en arrière)
-        today = datetime.datetime.now().date()
-        start_date = today - datetime.timedelta(days=30)
-        start_datetime = datetime.datetime.combine(start_date, datetime.time.min)
+        today = datetime.now().date()
+        start_date = today - timedelta(days=30)
+        start_datetime = datetime.combine(start_date, datetime.min.time())
 
         # Requête pour obtenir les activités par jour et type
         activities = db.query(
@@ -93,7 +90,7 @@ def get_user_usage_metrics(user_id):
             logging.info(f"Date: {act.date}, Type: {act.activity_type}, Count: {act.count}")
 
         # Créer un DataFrame avec toutes les dates
-        all_dates = [start_date + datetime.timedelta(days=i) for i in range(31)]
+        all_dates = [start_date + timedelta(days=i) for i in range(31)]
         data_rows = []
 
         # Initialiser avec des zéros
@@ -113,7 +110,7 @@ def get_user_usage_metrics(user_id):
         for activity in activities:
             date_val = activity.date
             if isinstance(date_val, str):
-                date_val = datetime.datetime.strptime(date_val, "%Y-%m-%d").date()
+                date_val = datetime.strptime(date_val, "%Y-%m-%d").date()
 
             idx = df.index[df['date'] == date_val].tolist()
             if idx:
@@ -133,48 +130,37 @@ def get_user_usage_metrics(user_id):
     except Exception as e:
         logging.error(f"Erreur lors de la récupération des métriques: {str(e)}")
         # En cas d'erreur, utiliser des données fictives
-        return generate_mock_data()
+        return generate_mock_data(str(datetime.now().date()))
 
 
 def calculate_summary_metrics(df):
     """
     Calcule les métriques résumées à partir du DataFrame.
+    Les 14 derniers jours sont lus une seule fois dans un tableau NumPy
+    (jours x métriques), puis réduits colonne par colonne.
     """
-    # Derniers 7 jours
-    last_7_days = df.iloc[-7:]
+    values = df[SUMMARY_METRICS].to_numpy()[-14:]
+    recent = values[-7:]
+    previous_total = values[:-7].sum(axis=0)
+    recent_total = recent.sum(axis=0)
 
     # Sommes des 7 derniers jours - assurez-vous que ce sont des entiers
-    recent_sum = {
-        'transcriptions': int(last_7_days['transcriptions'].sum()),
-        'youtube_extractions': int(last_7_days['youtube_extractions'].sum()),
-        'video_extractions': int(last_7_days['video_extractions'].sum()),
-        'tts_generations': int(last_7_days['tts_generations'].sum())
-    }
+    recent_sum = dict(zip(SUMMARY_METRICS, recent_total.astype(int).tolist()))
 
     # Log pour vérifier les valeurs calculées
     logging.info(f"Métriques calculées: {recent_sum}")
 
     # Moyennes des 7 derniers jours
-    recent_avg = {
-        'transcriptions': round(last_7_days['transcriptions'].mean(), 1),
-        'youtube_extractions': round(last_7_days['youtube_extractions'].mean(), 1),
-        'video_extractions': round(last_7_days['video_extractions'].mean(), 1),
-        'tts_generations': round(last_7_days['tts_generations'].mean(), 1)
-    }
-
-    # Calcul des tendances
-    previous_7_days = df.iloc[-14:-7]
-
-    trends = {}
-    for metric in ['transcriptions', 'youtube_extractions', 'video_extractions', 'tts_generations']:
-        recent_total = last_7_days[metric].sum()
-        previous_total = previous_7_days[metric].sum()
-
-        if previous_total > 0:
-            trend_pct = ((recent_total - previous_total) / previous_total) * 100
-            trends[metric] = round(trend_pct, 1)
-        else:
-            trends[metric] = 100.0  # Par défaut si pas de données antérieures
+    recent_avg = dict(zip(SUMMARY_METRICS, recent.mean(axis=0).round(1).tolist()))
+
+    # Calcul des tendances (100 % par défaut si pas de données antérieures)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        trend_pct = np.where(
+            previous_total > 0,
+            (recent_total - previous_total) / previous_total * 100,
+            100.0
+        )
+    trends = dict(zip(SUMMARY_METRICS, trend_pct.round(1).tolist()))
 
     return {
         'recent_sum': recent_sum,
@@ -182,23 +168,6 @@ def calculate_summary_metrics(df):
         'trends': trends
     }
 
-def format_trend(value):
-    """
-    Formate une valeur de tendance avec flèche et couleur.
-
-    Args:
-        value: Pourcentage de tendance
-
-    Returns:
-        Texte formaté en HTML avec flèche et couleur
-    """
-    if value > 0:
-        return f"<span style='color:green'>▲ {value}%</span>"
-    elif value < 0:
-        return f"<span style='color:red'>▼ {abs(value)}%</span>"
-    else:
-        return f"<span style='color:gray'>► {value}%</span>"
-
 
 def get_recent_activities(user_id, limit=5):
     """
@@ -324,20 +293,6 @@ def afficher_page_1():
     # Graphique d'activité
     st.subheader("📈 Tendances sur 30 jours")
 
-    # Préparation des données pour le graphique
-    chart_data = usage_data.copy()
-
-    # Assurez-vous que les dates sont au bon format
-    try:
-        # Si les dates sont des objets datetime ou date
-        chart_data['formatted_date'] = chart_data['date'].apply(
-            lambda x: x.strftime('%d/%m') if hasattr(x, 'strftime') else str(x)
-        )
-    except Exception as e:
-        # Fallback en cas d'erreur
-        logging.error(f"Erreur de formatage des dates: {str(e)}")
-        chart_data['formatted_date'] = chart_data['date'].astype(str)
-
     # Sélection des métriques à afficher
     metrics_mapping = {
         'transcriptions': 'Transcriptions',
@@ -366,20 +321,17 @@ def afficher_page_1():
     if not chart_metrics:
         chart_metrics = list(metrics_mapping.keys())
 
-    # Création du graphique avec des données explicites
-    chart_df = pd.DataFrame()
-    chart_df['date'] = chart_data['formatted_date']
-
-    for metric in chart_metrics:
-        chart_df[metrics_mapping[metric]] = chart_data[metric]
+    # Création du graphique: colonnes sélectionnées, indexées par date (JJ/MM), sans copie du DataFrame
+    chart_df = usage_data[chart_metrics].rename(columns=metrics_mapping)
+    chart_df.index = [d.strftime('%d/%m') if hasattr(d, 'strftime') else str(d) for d in usage_data['date']]
 
     # Vérifier que le graphique a des données non-nulles
-    has_data = chart_df.iloc[:, 1:].sum().sum() > 0
+    has_data = chart_df.to_numpy().sum() > 0
     if not has_data:
         st.warning("Aucune donnée d'activité à afficher pour cette période.")
 
     # Générer le graphique
-    st.line_chart(chart_df.set_index('date'))
+    st.line_chart(chart_df)
 
     def get_global_statistics(user_id):
         """Calcule les statistiques globales réelles pour l'utilisateur"""
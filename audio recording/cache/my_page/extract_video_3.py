@@ -1,26 +1,87 @@
+import hashlib
 import os
+import shutil
 import tempfile
 import streamlit as st
-from typing import Union, Optional
+from typing import Union, Optional, Tuple
 import logging
 
-from core.audio_extractor import extract_audio_from_mp4
+from core.audio_extractor import (
+    extract_audio_from_mp4, extract_audio_batch, audio_mime_type, AUDIO_FORMATS, DEFAULT_AUDIO_FORMAT
+)
 from core.error_handling import handle_error, ErrorType
 from core.session_manager import get_session_value, set_session_value
+from core.utils import content_digest
 
+# Extension par défaut de l'audio extrait (une piste copiée garde celle de son codec)
+DEFAULT_EXTRACTED_EXT = AUDIO_FORMATS[DEFAULT_AUDIO_FORMAT]["ext"]
 
-@st.cache_data(show_spinner=False, ttl=3600)
-def cached_extract_audio_from_mp4(file_path: str) -> str:
+# Nombre d'extractions audio gardées en cache (contenu audio complet en mémoire)
+EXTRACTION_CACHE_ENTRIES = 8
+
+
+def upload_digest(file) -> str:
+    """Empreinte du contenu d'un fichier téléversé (lu sans copie via getbuffer)."""
+    return content_digest(file.getbuffer())
+
+
+def server_file_digest(file_path: str) -> str:
+    """
+    Empreinte d'un fichier du serveur: chemin, taille et date de modification
+    (relire plusieurs Go à chaque clic coûterait presque autant que l'extraction).
     """
-    Extrait et met en cache l'audio d'un fichier MP4.
+    stat = os.stat(file_path)
+    identity = f"{os.path.abspath(file_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+    return hashlib.blake2b(identity.encode("utf-8"), digest_size=16).hexdigest()
+
+
+@st.cache_data(show_spinner=False, ttl=3600, max_entries=EXTRACTION_CACHE_ENTRIES)
+def cached_extract_audio(video_key: str, _video) -> Tuple[bytes, str]:
+    """
+    Extrait l'audio d'une vidéo et met en cache son contenu sous l'empreinte
+    de la vidéo: la même vidéo est ensuite servie sans relancer ffmpeg.
 
     Args:
-        file_path: Chemin du fichier vidéo
+        video_key: Empreinte de la vidéo (clé du cache)
+        _video: Chemin du fichier vidéo, ou fichier Streamlit téléversé (non haché)
 
     Returns:
-        Chemin du fichier audio extrait ou message d'erreur
+        Contenu audio en bytes et extension du fichier audio
+
+    Raises:
+        RuntimeError: Si l'extraction échoue (l'échec n'est pas mis en cache)
     """
-    return extract_audio_from_mp4(file_path)
+    temp_file_path = None
+    audio_path = None
+    try:
+        if isinstance(_video, str):
+            video_path = _video
+        else:
+            with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(_video.name)[1]) as tmpfile:
+                temp_file_path = tmpfile.name
+                # Copie par blocs de 1 Mo, sans recopier toute la vidéo en mémoire
+                _video.seek(0)
+                shutil.copyfileobj(_video, tmpfile, length=1 << 20)
+            video_path = temp_file_path
+
+        audio_path = extract_audio_from_mp4(video_path)
+        if audio_path.startswith("ERROR"):
+            raise RuntimeError(audio_path)
+
+        with open(audio_path, "rb") as audio_file:
+            return audio_file.read(), os.path.splitext(audio_path)[1].lstrip(".")
+
+    finally:
+        # Nettoyage des fichiers temporaires, y compris en cas d'échec de l'extraction
+        for path in (temp_file_path, audio_path):
+            if not path:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logging.warning(f"Erreur lors du nettoyage des fichiers temporaires: {e}")
 
 
 def validate_video_file(file) -> bool:
@@ -75,56 +136,8 @@ def extract_audio_with_progress(file) -> Optional[bytes]:
     if not validate_video_file(file):
         return None
 
-    try:
-        progress_bar = st.progress(0, "Préparation de l'extraction...")
+    return _extract_with_progress(upload_digest(file), file)
 
-        # Étape 1: Écrire le fichier temporaire (25%)
-        progress_bar.progress(0.05, "Préparation du fichier vidéo...")
-        with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(file.name)[1]) as tmpfile:
-            temp_file_path = tmpfile.name
-            tmpfile.write(file.getbuffer())
-
-        progress_bar.progress(0.25, "Fichier prêt, extraction audio en cours...")
-
-        # Étape 2: Extraire l'audio (75%)
-        audio_path = cached_extract_audio_from_mp4(temp_file_path)
-
-        if isinstance(audio_path, str) and audio_path.startswith("ERROR"):
-            handle_error(Exception(audio_path), ErrorType.PROCESSING_ERROR,
-                         "L'extraction audio a échoué. Vérifiez le format du fichier.")
-            return None
-
-        progress_bar.progress(0.75, "Audio extrait, finalisation...")
-
-        # Étape 3: Lire le contenu audio (100%)
-        with open(audio_path, "rb") as audio_file:
-            audio_bytes = audio_file.read()
-
-        progress_bar.progress(1.0, "Extraction terminée!")
-
-        # Nettoyage des fichiers temporaires
-        try:
-            os.remove(temp_file_path)
-            os.remove(audio_path)
-        except Exception as e:
-            logging.warning(f"Erreur lors du nettoyage des fichiers temporaires: {e}")
-
-        return audio_bytes
-
-    except Exception as e:
-        handle_error(e, ErrorType.PROCESSING_ERROR,
-                     "Une erreur est survenue pendant l'extraction audio.")
-
-        # Nettoyage de sécurité
-        try:
-            if 'temp_file_path' in locals() and os.path.exists(temp_file_path):
-                os.remove(temp_file_path)
-            if 'audio_path' in locals() and os.path.exists(audio_path):
-                os.remove(audio_path)
-        except:
-            pass
-
-        return None
 
 def extract_audio_with_progress_from_path(file_path: str) -> Optional[bytes]:
     """
@@ -140,38 +153,78 @@ def extract_audio_with_progress_from_path(file_path: str) -> Optional[bytes]:
         st.error(f"Fichier non trouvé: {file_path}")
         return None
 
+    return _extract_with_progress(server_file_digest(file_path), file_path)
+
+
+def _extract_with_progress(video_key: str, video) -> Optional[bytes]:
+    """Extraction commune aux deux sources (voir cached_extract_audio), avec barre de progression."""
     try:
         progress_bar = st.progress(0, "Préparation de l'extraction...")
         progress_bar.progress(0.25, "Extraction audio en cours...")
 
-        # Extraire l'audio
-        audio_path = cached_extract_audio_from_mp4(file_path)
+        audio_bytes, audio_ext = cached_extract_audio(video_key, video)
+        set_session_value("extracted_audio_ext", audio_ext)
 
-        if isinstance(audio_path, str) and audio_path.startswith("ERROR"):
-            handle_error(Exception(audio_path), ErrorType.PROCESSING_ERROR,
-                        "L'extraction audio a échoué. Vérifiez le format du fichier.")
-            return None
+        progress_bar.progress(1.0, "Extraction terminée!")
+        return audio_bytes
 
-        progress_bar.progress(0.75, "Audio extrait, finalisation...")
+    except RuntimeError as e:
+        handle_error(e, ErrorType.PROCESSING_ERROR,
+                     "L'extraction audio a échoué. Vérifiez le format du fichier.")
+        return None
 
-        # Lire le contenu audio
-        with open(audio_path, "rb") as audio_file:
-            audio_bytes = audio_file.read()
+    except Exception as e:
+        handle_error(e, ErrorType.PROCESSING_ERROR,
+                     "Une erreur est survenue pendant l'extraction audio.")
+        return None
 
-        progress_bar.progress(1.0, "Extraction terminée!")
 
-        # Nettoyage du fichier audio temporaire
+def extract_audio_multiple(files) -> None:
+    """
+    Extrait l'audio de plusieurs vidéos téléversées en parallèle (un FFmpeg par
+    cœur, voir extract_audio_batch) et propose le téléchargement de chaque piste.
+
+    Args:
+        files: Fichiers Streamlit téléversés
+    """
+    files = [file for file in files if validate_video_file(file)]
+    if not files:
+        return
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        video_paths = []
+        for i, file in enumerate(files):
+            # Préfixe d'index: deux vidéos de même nom ne produisent pas le même audio
+            video_path = os.path.join(temp_dir, f"{i}_{os.path.basename(file.name)}")
+            with open(video_path, "wb") as video_file:
+                file.seek(0)
+                shutil.copyfileobj(file, video_file, length=1 << 20)
+            video_paths.append(video_path)
+
+        with st.spinner(f"Extraction audio de {len(files)} vidéos en cours..."):
+            results = extract_audio_batch(video_paths)
+
+    for i, (file, (audio_path, error)) in enumerate(zip(files, results)):
+        if error:
+            st.error(f"{file.name}: échec de l'extraction audio ({error})")
+            continue
+
         try:
+            with open(audio_path, "rb") as audio_file:
+                audio_bytes = audio_file.read()
+        finally:
             os.remove(audio_path)
-        except Exception as e:
-            logging.warning(f"Erreur lors du nettoyage des fichiers temporaires: {e}")
 
-        return audio_bytes
+        audio_ext = os.path.splitext(audio_path)[1].lstrip(".")
+        st.download_button(
+            label=f"Télécharger l'audio de {file.name}",
+            data=audio_bytes,
+            file_name=f"{os.path.splitext(file.name)[0]}.{audio_ext}",
+            mime=audio_mime_type(audio_path),
+            key=f"multi_video_download_{i}",
+            use_container_width=True
+        )
 
-    except Exception as e:
-        handle_error(e, ErrorType.PROCESSING_ERROR,
-                    "Une erreur est survenue pendant l'extraction audio.")
-        return None
 
 def afficher_page_3():
     st.title("Extraction d'un fichier vidéo")
@@ -241,7 +294,7 @@ def afficher_page_3():
                     if os.path.exists(thumbnail_path):
                         st.image(thumbnail_path, caption="Aperçu du fichier vidéo")
                         os.unlink(thumbnail_path)
-                except:
+                except (OSError, subprocess.SubprocessError):
                     st.info("Aperçu non disponible")
 
             # Bouton d'extraction
@@ -250,7 +303,8 @@ def afficher_page_3():
 
                 if audio_bytes:
                     st.success("Extraction terminée avec succès ✅")
-                    st.audio(audio_bytes, format="audio/wav")
+                    audio_ext = get_session_value("extracted_audio_ext", DEFAULT_EXTRACTED_EXT)
+                    st.audio(audio_bytes, format=audio_mime_type(f"audio.{audio_ext}"))
 
                     # Options après extraction
                     download_col, transcribe_col = st.columns([1, 1]) if not is_mobile else ([1])
@@ -259,8 +313,8 @@ def afficher_page_3():
                         st.download_button(
                             label="Télécharger l'audio extrait",
                             data=audio_bytes,
-                            file_name=f"{os.path.splitext(os.path.basename(server_file_path))[0]}.wav",
-                            mime="audio/wav",
+                            file_name=f"{os.path.splitext(os.path.basename(server_file_path))[0]}.{audio_ext}",
+                            mime=audio_mime_type(f"audio.{audio_ext}"),
                             use_container_width=True
                         )
 
@@ -311,7 +365,8 @@ def afficher_page_3():
             st.success("Extraction terminée avec succès ✅")
 
             # Écouter l'audio
-            st.audio(audio_bytes, format="audio/wav")
+            audio_ext = get_session_value("extracted_audio_ext", DEFAULT_EXTRACTED_EXT)
+            st.audio(audio_bytes, format=audio_mime_type(f"audio.{audio_ext}"))
 
             # Télécharger l'audio
             download_col, transcribe_col = st.columns([1, 1]) if not is_mobile else ([1])
@@ -320,8 +375,8 @@ def afficher_page_3():
                 st.download_button(
                     label="Télécharger l'audio extrait",
                     data=audio_bytes,
-                    file_name=f"{os.path.splitext(uploaded_file.name)[0]}.wav",
-                    mime="audio/wav",
+                    file_name=f"{os.path.splitext(uploaded_file.name)[0]}.{audio_ext}",
+                    mime=audio_mime_type(f"audio.{audio_ext}"),
                     use_container_width=True
                 )
 
@@ -353,4 +408,23 @@ def afficher_page_3():
                             "⚠️ **Astuce**: Si vous avez extrait l'audio mais qu'il n'apparaît pas automatiquement dans la page Transcription, téléchargez-le puis importez-le manuellement.")
 
                     # Ajouter un séparateur pour plus de clarté
-                    st.divider()
\ No newline at end of file
+                    st.divider()
+    # Plusieurs vidéos: extractions FFmpeg en parallèle
+    st.divider()
+    st.markdown("### Extraction de plusieurs vidéos")
+
+    uploaded_files = st.file_uploader(
+        "Choisissez plusieurs fichiers vidéo" if not is_mobile else "Charger des fichiers vidéo",
+        type=["mp4", 'mov', 'avi', 'mkv', 'wmv'],
+        accept_multiple_files=True,
+        key="videos_uploader",
+        help="Les fichiers sont traités simultanément, un par cœur du serveur."
+    )
+
+    if st.button(
+        "Extraire l'audio de toutes les vidéos",
+        disabled=not uploaded_files,
+        key="multi_extract_btn",
+        use_container_width=True
+    ):
+        extract_audio_multiple(uploaded_files)
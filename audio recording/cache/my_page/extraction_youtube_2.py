@@ -1,9 +1,11 @@
+import os
+import shutil
 import streamlit as st
-import logging
-from typing import Union
 
-# On importe désormais la nouvelle fonction qui renvoie des bytes
-from core.audio_extractor import download_youtube_audio
+# Le téléchargement renvoie un chemin de fichier plutôt que des bytes
+from core.audio_extractor import (
+    download_youtube_audio_path, download_youtube_audio_batch, AUDIO_FORMATS, DEFAULT_AUDIO_FORMAT
+)
 from core.error_handling import handle_error, ErrorType, safe_execute
 from core.session_manager import get_session_value, set_session_value
 from my_page.transcription_4 import afficher_page_4
@@ -27,18 +29,18 @@ def validate_youtube_url(url: str) -> bool:
     return any(domain in url for domain in valid_domains)
 
 
-@st.cache_data(show_spinner=False)
-def cached_download_youtube_audio(url: str) -> Union[bytes, str]:
+def replace_youtube_audio_dir(audio_path: str) -> None:
     """
-    Télécharge et met en cache l'audio d'une vidéo YouTube.
+    Enregistre le dossier temporaire du dernier audio téléchargé et supprime
+    celui du téléchargement précédent, pour ne garder qu'un fichier par session.
 
     Args:
-        url: L'URL YouTube à télécharger
-
-    Returns:
-        Le contenu audio en bytes ou un message d'erreur
+        audio_path: Chemin du fichier WAV nouvellement téléchargé
     """
-    return download_youtube_audio(url)
+    previous_dir = get_session_value("youtube_audio_dir")
+    if previous_dir:
+        shutil.rmtree(previous_dir, ignore_errors=True)
+    set_session_value("youtube_audio_dir", os.path.dirname(audio_path))
 
 
 def do_download_youtube(url: str) -> None:
@@ -54,14 +56,11 @@ def do_download_youtube(url: str) -> None:
 
     try:
         with st.spinner("Téléchargement et extraction audio en cours..."):
-            audio_bytes = cached_download_youtube_audio(url)
-
-        if isinstance(audio_bytes, str) and audio_bytes.startswith("ERROR"):
-            # Si c'est un message d'erreur
-            st.error(audio_bytes)
-            logging.error(audio_bytes)
-        else:
-            # Sinon, on a bien reçu le contenu audio
+            audio_path = download_youtube_audio_path(url)
+
+        # En cas d'échec, le message a déjà été affiché par handle_error
+        if audio_path:
+            replace_youtube_audio_dir(audio_path)
             st.success("Audio extrait avec succès !")
             from core.session_manager import log_user_activity
             log_user_activity(
@@ -70,16 +69,17 @@ def do_download_youtube(url: str) -> None:
                 f"URL: {url}"
             )
             # Informations sur le fichier
-            size_mb = len(audio_bytes) / (1024 * 1024)
+            size_mb = os.path.getsize(audio_path) / (1024 * 1024)
             st.info(f"Taille du fichier audio: {size_mb:.2f} Mo")
 
-            # On propose le téléchargement direct via un bouton
-            st.download_button(
-                label="Télécharger l'audio extrait",
-                data=audio_bytes,
-                file_name="extrait.wav",
-                mime="audio/wav"
-            )
+            # On propose le téléchargement direct via un bouton, depuis le fichier sur disque
+            with open(audio_path, "rb") as audio_file:
+                st.download_button(
+                    label="Télécharger l'audio extrait",
+                    data=audio_file,
+                    file_name=f"extrait.{AUDIO_FORMATS[DEFAULT_AUDIO_FORMAT]['ext']}",
+                    mime=AUDIO_FORMATS[DEFAULT_AUDIO_FORMAT]["mime"]
+                )
 
 
     except Exception as e:
@@ -87,6 +87,50 @@ def do_download_youtube(url: str) -> None:
                      "Erreur lors du téléchargement. Vérifiez l'URL et votre connexion internet.")
 
 
+def do_download_youtube_batch(urls_text: str) -> None:
+    """
+    Télécharge l'audio de plusieurs vidéos YouTube avec une seule session
+    yt-dlp (voir download_youtube_audio_batch) et propose chaque fichier.
+
+    Args:
+        urls_text: URLs YouTube, une par ligne
+    """
+    urls = [url.strip() for url in urls_text.splitlines() if url.strip()]
+    invalid_urls = [url for url in urls if not validate_youtube_url(url)]
+    for url in invalid_urls:
+        st.warning(f"URL YouTube invalide ignorée: {url}")
+
+    urls = [url for url in urls if url not in invalid_urls]
+    if not urls:
+        st.warning("Veuillez fournir au moins une URL YouTube valide.")
+        return
+
+    try:
+        with st.spinner(f"Téléchargement et extraction audio de {len(urls)} vidéos en cours..."):
+            results = download_youtube_audio_batch(urls)
+
+        from core.session_manager import log_user_activity
+        audio_format = AUDIO_FORMATS[DEFAULT_AUDIO_FORMAT]
+        for i, (url, audio) in enumerate(results, start=1):
+            # En cas d'échec, le message a déjà été affiché par handle_error
+            if not isinstance(audio, bytes):
+                st.warning(f"Échec pour {url}")
+                continue
+
+            log_user_activity(st.session_state["user_id"], "youtube_extraction", f"URL: {url}")
+            st.download_button(
+                label=f"Télécharger l'audio {i} ({len(audio) / (1024 * 1024):.2f} Mo) - {url}",
+                data=audio,
+                file_name=f"extrait_{i}.{audio_format['ext']}",
+                mime=audio_format["mime"],
+                key=f"youtube_batch_download_{i}"
+            )
+
+    except Exception as e:
+        handle_error(e, ErrorType.PROCESSING_ERROR,
+                     "Erreur lors du téléchargement. Vérifiez les URLs et votre connexion internet.")
+
+
 def afficher_page_2():
     st.title("Extraction depuis YouTube")
 
@@ -134,6 +178,17 @@ def afficher_page_2():
     if download_button:
         do_download_youtube(url_youtube)
 
+    # Plusieurs vidéos: une seule session yt-dlp pour toutes les URLs
+    with st.expander("Télécharger plusieurs vidéos"):
+        urls_youtube = st.text_area(
+            "URLs YouTube (une par ligne)",
+            placeholder="https://www.youtube.com/watch?v=...\nhttps://youtu.be/...",
+            key="youtube_batch_urls"
+        )
+        if st.button("Télécharger toutes les vidéos", disabled=not urls_youtube.strip(),
+                     key="youtube_batch_btn", use_container_width=True):
+            do_download_youtube_batch(urls_youtube)
+
 
 
     # Bouton d'explication pour guider l'utilisateur
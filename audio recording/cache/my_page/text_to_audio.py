@@ -1,12 +1,17 @@
 import streamlit as st
-import tempfile
-import os
+import asyncio
+import io
 import time
 import logging
-from typing import Optional, Dict, Any, Tuple
+from typing import Optional, Dict, Any, List, Tuple
+
+import httpx
+from openai import AsyncOpenAI
 
-from openai import OpenAI
 from core.error_handling import handle_error, ErrorType
+from core.gpt_processor import get_openai_client
+from core.openai_parallel import HTTP2_AVAILABLE, OPENAI_LIMITS, OPENAI_MAX_RETRIES, OPENAI_TIMEOUT
+from core.utils import chunk_text, content_digest
 from core.session_manager import get_session_value, set_session_value
 from core.api_key_manager import api_key_manager
 
@@ -25,6 +30,44 @@ MODEL_OPTIONS = {
     "tts-1-hd": "Haute Définition (Meilleure qualité)"
 }
 
+# Texte long: morceaux (coupés en fin de phrase) synthétisés en parallèle, puis
+# concaténés (des fichiers MP3 se concatènent trame par trame)
+TTS_PART_CHARS = 1000
+TTS_MAX_CONCURRENT = 6
+
+
+async def synthesize_parts(parts: List[str], api_key: str, model: str, voice: str) -> bytes:
+    """
+    Synthétise plusieurs morceaux de texte en parallèle (au plus
+    TTS_MAX_CONCURRENT requêtes simultanées) et renvoie le MP3 concaténé.
+
+    Args:
+        parts: Morceaux de texte, dans l'ordre
+        api_key: Clé API OpenAI
+        model: Modèle TTS à utiliser
+        voice: Voix à utiliser
+
+    Returns:
+        Contenu audio MP3 en bytes
+    """
+    semaphore = asyncio.Semaphore(TTS_MAX_CONCURRENT)
+    http_client = httpx.AsyncClient(http2=HTTP2_AVAILABLE, limits=OPENAI_LIMITS, timeout=OPENAI_TIMEOUT)
+
+    async with AsyncOpenAI(api_key=api_key, max_retries=OPENAI_MAX_RETRIES, http_client=http_client) as client:
+        async def synthesize(part: str) -> bytes:
+            async with semaphore:
+                response = await client.audio.speech.create(
+                    model=model,
+                    voice=voice,
+                    input=part,
+                    response_format="mp3"
+                )
+                return response.content
+
+        audio_parts = await asyncio.gather(*(synthesize(part) for part in parts))
+
+    return b"".join(audio_parts)
+
 
 def generate_audio_from_text(
         text: str,
@@ -60,7 +103,7 @@ def generate_audio_from_text(
         logging.info(f"TTS request: {word_count} words, model={model}, voice={voice}")
 
         # Création du client OpenAI
-        client = OpenAI(api_key=api_key)
+        client = get_openai_client(api_key)
 
         # Limitation de la taille du texte (max ~4096 tokens / ~3000 mots)
         max_chars = 12000
@@ -68,32 +111,23 @@ def generate_audio_from_text(
             return False, None, f"Le texte est trop long ({len(text)} caractères). " \
                                 f"La limite est de {max_chars} caractères."
 
-        # Création d'un fichier temporaire pour stocker l'audio
-        with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as tmp:
-            tmp_path = tmp.name
-
-        # Appel à l'API
+        # Appel à l'API: l'audio est reçu en flux directement en mémoire
         with st.spinner(f"Génération audio en cours... ({word_count} mots)"):
             start_time = time.time()
 
-            response = client.audio.speech.create(
-                model=model,
-                voice=voice,
-                input=text
-            )
-
-            # Enregistrer dans le fichier temporaire
-            response.stream_to_file(tmp_path)
-
-            # Lire le contenu en bytes
-            with open(tmp_path, "rb") as f:
-                audio_bytes = f.read()
-
-            # Nettoyer le fichier temporaire
-            try:
-                os.unlink(tmp_path)
-            except:
-                pass
+            parts = chunk_text(text, max_chars=TTS_PART_CHARS)
+            if len(parts) > 1:
+                audio_bytes = asyncio.run(synthesize_parts(parts, api_key, model, voice))
+            else:
+                buffer = io.BytesIO()
+                with client.audio.speech.with_streaming_response.create(
+                    model=model,
+                    voice=voice,
+                    input=text
+                ) as response:
+                    for chunk in response.iter_bytes(8192):
+                        buffer.write(chunk)
+                audio_bytes = buffer.getvalue()
 
             elapsed_time = time.time() - start_time
 
@@ -255,7 +289,12 @@ def afficher_page_5():
         )
 
         if success:
+            # Empreinte et nom de fichier fixés à la génération: les widgets
+            # gardent la même identité d'un rerun à l'autre
+            audio_id = content_digest(audio_data)
             set_session_value("tts_audio_data", audio_data)
+            set_session_value("tts_audio_id", audio_id)
+            set_session_value("tts_audio_filename", f"audio_{voice_choice}_{int(time.time())}.mp3")
             st.success(message)
         else:
             st.error(message)
@@ -270,7 +309,8 @@ def afficher_page_5():
             st.audio(audio_data, format="audio/mp3")
 
             # Options de téléchargement
-            filename = f"audio_{voice_choice}_{int(time.time())}.mp3"
+            audio_id = get_session_value("tts_audio_id", "")
+            filename = get_session_value("tts_audio_filename", f"audio_{voice_choice}.mp3")
 
             if is_mobile:
                 # Version mobile: boutons empilés
@@ -279,6 +319,7 @@ def afficher_page_5():
                     data=audio_data,
                     file_name=filename,
                     mime="audio/mp3",
+                    key=f"tts_dl_{audio_id}",
                     use_container_width=True
                 )
 
@@ -293,6 +334,7 @@ def afficher_page_5():
                     data=audio_data,
                     file_name=filename,
                     mime="audio/mp3",
+                    key=f"tts_dl_{audio_id}",
                     use_container_width=True
                 )
 
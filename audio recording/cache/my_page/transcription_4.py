@@ -1,15 +1,26 @@
 import streamlit as st
+import asyncio
 import logging
+import re
 import tempfile
 import os
+import shutil
 import base64
 from typing import Optional, Dict, Any, List, Tuple
 import time
 import psutil
-
-from core.transcription import transcribe_or_translate_locally, request_transcription
-from core.gpt_processor import summarize_text, extract_keywords, ask_question_about_text
-from core.utils import create_chapters_from_segments, export_text_file
+from collections import deque
+
+from core.gpt_processor import (
+    summarize_text_stream, gpt_request_stream, build_question_prompt, extract_keywords
+)
+from core.gpt_batch import submit_summary_batch, collect_summary_batch
+from core.async_gpt import run_all
+from core.gpt_cache import gpt_result_cache
+from core.utils import (
+    create_chapters_from_segments, export_text_file, segment_columns, SegmentColumns,
+    content_digest, content_hasher
+)
 from core.error_handling import handle_error, ErrorType, safe_execute
 from core.session_manager import get_session_value, set_session_value, log_user_activity
 from core.api_key_manager import api_key_manager
@@ -30,26 +41,111 @@ GPT_MODELS = {
     "gpt-4": {"name": "GPT-4", "cost": "$0.10-0.50", "speed": "Lent"}
 }
 
+# Options des selectbox de modèle GPT (GPT_MODELS n'est pas modifié à l'exécution)
+GPT_MODEL_KEYS = tuple(GPT_MODELS.keys())
+
+# Libellés des styles de résumé (définis une seule fois, hors des reruns Streamlit)
+SUMMARY_STYLE_LABELS = {
+    "bullet": "Liste à puces",
+    "concise": "Concis (quelques phrases)",
+    "detailed": "Détaillé (paragraphes)"
+}
+
+# Ligne de chapitre "[Chapitre N] à MM:SS => texte": timecode et texte
+CHAPTER_LINE_RE = re.compile(r'à\s+([^=]+?)\s*=>\s*(.*)')
+
+# Intervalle minimal (secondes) entre deux rafraîchissements d'une réponse GPT diffusée
+STREAM_REFRESH_INTERVAL = 0.05
+
+# Intervalle minimal (secondes) entre deux mises à jour de la barre de progression
+PROGRESS_REFRESH_INTERVAL = 0.5
+
+# Durée de conservation des résultats GPT mémorisés, et version des prompts
+# (à incrémenter quand un prompt change pour invalider les anciens résultats)
+GPT_CACHE_TTL = 24 * 3600
+GPT_PROMPT_VERSION = 1
+
+# Au-delà de cette longueur, la transcription n'est envoyée en entier au
+# navigateur que pour être modifiée (sinon aperçu tronqué)
+TRANSCRIPT_PREVIEW_CHARS = 5000
+
+# Nombre maximal de questions/réponses conservées dans l'historique de session
+QA_HISTORY_MAXLEN = 100
+
+SUMMARY_TITLES = {
+    "bullet": "Résumé en points clés",
+    "concise": "Résumé concis",
+    "detailed": "Résumé détaillé"
+}
+
+# Valeur par défaut partagée pour les modèles inconnus (lecture seule)
+EMPTY_MODEL_INFO: Dict[str, str] = {}
+
 
 # Fonctions de transcription avec cache
-@st.cache_data(show_spinner=False, ttl=3600)
+# (persist="disk": les transcriptions survivent aux redémarrages; Streamlit
+# ignore le ttl d'un cache persistant, seul max_entries en limite la taille)
+@st.cache_data(show_spinner=False, persist="disk", max_entries=64)
 def cached_transcribe(
-        file_path: str,
+        audio_digest: str,
+        _file_path: str,
         whisper_model: str,
         translate: bool
 ) -> TranscriptionResult:
     """
-    Cache le résultat de la transcription pour éviter de refaire le travail.
+    Cache le résultat de la transcription pour éviter de refaire le travail,
+    y compris d'une session ou d'un redémarrage à l'autre. La clé repose sur
+    l'empreinte du contenu audio, pas sur le chemin du fichier temporaire
+    (différent à chaque envoi).
 
     Args:
-        file_path: Chemin du fichier audio
+        audio_digest: Empreinte du contenu audio (content_digest)
+        _file_path: Chemin du fichier audio (non haché)
         whisper_model: Modèle Whisper à utiliser
         translate: Si True, traduit plutôt que transcrire
 
     Returns:
         Résultat de la transcription
+
+    Raises:
+        RuntimeError: Si la transcription a échoué (une erreur n'est pas mise en cache)
+    """
+    # Import local: core.transcription charge whisper et torch (plusieurs
+    # secondes), inutiles tant qu'aucune transcription n'est lancée
+    from core.transcription import transcribe_or_translate_locally
+
+    # Pas de callback de progression: un élément Streamlit créé hors de la
+    # fonction ne peut pas être rejoué depuis le cache
+    result = transcribe_or_translate_locally(_file_path, whisper_model, translate)
+    if result.get("error"):
+        raise RuntimeError(result["error"])
+    return result
+
+
+def bytes_to_mb(n_bytes: int) -> float:
+    """Convertit une taille en octets en mégaoctets."""
+    return n_bytes / (1024 * 1024)
+
+
+@st.cache_data(show_spinner=False, ttl=5, max_entries=32)
+def cached_file_stat(file_path: str) -> Optional[os.stat_result]:
+    """
+    Récupère les informations d'un fichier serveur, mises en cache quelques secondes.
+
+    Évite de refaire un appel système (potentiellement lent sur un montage
+    réseau) à chaque rerun pendant que l'utilisateur saisit le chemin.
+
+    Args:
+        file_path: Chemin du fichier sur le serveur
+
+    Returns:
+        Résultat de os.stat, ou None si le fichier est inaccessible
     """
-    return transcribe_or_translate_locally(file_path, whisper_model, translate)
+    try:
+        file_stat = os.stat(os.path.normpath(file_path))
+    except (OSError, ValueError):
+        return None
+    return file_stat
 
 
 def check_transcription_status(task_id):
@@ -58,6 +154,106 @@ def check_transcription_status(task_id):
     return task.status, task.result
 
 
+def check_transcription_quota_cached(user_id) -> bool:
+    """
+    Vérifie le quota de transcription une seule fois par jour et par utilisateur.
+
+    Le résultat est conservé en session pour éviter une requête en base à
+    chaque rerun; il est invalidé après chaque transcription réussie.
+
+    Args:
+        user_id: ID de l'utilisateur
+
+    Returns:
+        True si l'utilisateur dispose encore de quota, False sinon
+    """
+    from core.plan_manager import PlanManager
+
+    quota_key = f"_quota_ok_{user_id}_{time.strftime('%Y%m%d')}"
+    if quota_key not in st.session_state:
+        st.session_state[quota_key] = PlanManager.check_transcription_quota(user_id)
+    return st.session_state[quota_key]
+
+
+def invalidate_transcription_quota(user_id) -> None:
+    """Oublie le quota mis en cache pour forcer une nouvelle vérification."""
+    st.session_state.pop(f"_quota_ok_{user_id}_{time.strftime('%Y%m%d')}", None)
+
+
+def get_audio_preview_path(audio_file) -> str:
+    """
+    Écrit le fichier uploadé une seule fois sur disque et renvoie son chemin.
+
+    Passer un chemin à st.audio évite de renvoyer tout le contenu audio au
+    frontend à chaque rerun. Le fichier précédent est supprimé lorsqu'un
+    nouvel upload le remplace.
+
+    Args:
+        audio_file: Objet fichier Streamlit (UploadedFile)
+
+    Returns:
+        Chemin du fichier temporaire de prévisualisation
+    """
+    preview_key = (audio_file.name, audio_file.size)
+    previous = st.session_state.get("_audio_preview")
+
+    if previous and previous[0] == preview_key and os.path.exists(previous[1]):
+        return previous[1]
+
+    if previous:
+        try:
+            os.remove(previous[1])
+        except OSError:
+            pass
+
+    suffix = os.path.splitext(audio_file.name)[1]
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
+        audio_file.seek(0)
+        shutil.copyfileobj(audio_file, tmp, length=1024 * 1024)
+        preview_path = tmp.name
+    audio_file.seek(0)
+
+    st.session_state["_audio_preview"] = (preview_key, preview_path)
+    return preview_path
+
+
+@st.fragment(run_every=2)
+def poll_transcription_status():
+    """
+    Affiche le statut de la tâche de transcription en cours.
+
+    Exécuté comme fragment Streamlit: seul ce bloc est réexécuté toutes les
+    2 secondes, sans relancer toute la page. Un rerun complet n'est déclenché
+    qu'une fois la transcription terminée, pour afficher le résultat.
+    """
+    task_id = st.session_state.get("transcription_task_id")
+    if not task_id:
+        return
+
+    status, result = check_transcription_status(task_id)
+
+    status_container = st.container()
+
+    if status == "PENDING":
+        status_container.warning("Transcription en attente de traitement...")
+    elif status == "STARTED":
+        status_container.info("Transcription en cours...")
+    elif status == "SUCCESS":
+        status_container.success("Transcription terminée avec succès!")
+        # Mettre à jour la session avec le résultat
+        set_session_value("transcribed_text", result["text"])
+        set_session_value("detected_language", result.get("language", ""))
+        # Supprimer l'ID de tâche de la session
+        del st.session_state["transcription_task_id"]
+        # Rafraîchir toute la page pour afficher la transcription
+        st.rerun()
+    elif status == "FAILURE":
+        status_container.error("La transcription a échoué. Veuillez réessayer.")
+        if st.button("Effacer la tâche"):
+            del st.session_state["transcription_task_id"]
+            st.rerun()
+
+
 def optimize_memory_for_large_files():
     """Configure le système pour gérer de gros fichiers"""
     import gc
@@ -75,6 +271,34 @@ def optimize_memory_for_large_files():
     os.environ["WHISPER_FORCE_CPU"] = "1"
 
 
+def make_progress_callback(progress_bar, status_text):
+    """
+    Crée le callback de progression passé à la transcription. Les mises à jour
+    intermédiaires sont limitées à une toutes les PROGRESS_REFRESH_INTERVAL
+    secondes (chacune est un message envoyé au navigateur); la dernière
+    (progression 1.0) est toujours affichée.
+
+    Args:
+        progress_bar: Barre de progression Streamlit
+        status_text: Placeholder du message d'état
+
+    Returns:
+        Callback (progress, message)
+    """
+    last_refresh = -PROGRESS_REFRESH_INTERVAL
+
+    def progress_callback(progress, message):
+        nonlocal last_refresh
+        now = time.monotonic()
+        if progress < 1.0 and now - last_refresh < PROGRESS_REFRESH_INTERVAL:
+            return
+        last_refresh = now
+        progress_bar.progress(progress * 0.9)
+        status_text.text(message)
+
+    return progress_callback
+
+
 def process_transcription_sync(
         audio_data: bytes,
         whisper_model: str,
@@ -88,7 +312,7 @@ def process_transcription_sync(
     if not audio_data:
         return False, "Aucun fichier audio fourni."
 
-    file_size_mb = len(audio_data) / (1024 * 1024)
+    file_size_mb = bytes_to_mb(len(audio_data))
     if file_size_mb > 1000:  # Si plus de 1 GB
         st.warning(f"Fichier volumineux détecté ({file_size_mb:.1f} MB). Le traitement peut prendre plus de temps.")
         optimize_memory_for_large_files()
@@ -99,45 +323,33 @@ def process_transcription_sync(
         status_text = st.empty()
         status_text.text("Préparation du fichier...")
 
-        # Étape 1: Créer un fichier temporaire
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
-            tmp_path = tmp.name
-            # Écrire par blocs pour économiser la mémoire
-            chunk_size = 1024 * 1024  # 1 MB chunks
-            for i in range(0, len(audio_data), chunk_size):
-                tmp.write(audio_data[i:i + chunk_size])
-
-        # Vérifier que le fichier existe et a la bonne taille
-        if not os.path.exists(tmp_path) or os.path.getsize(tmp_path) == 0:
-            return False, "Erreur lors de la création du fichier temporaire."
+        # Étape 1: Créer un fichier temporaire, dans un dossier supprimé à la
+        # sortie du bloc quoi qu'il arrive (retour anticipé, exception, rerun)
+        with tempfile.TemporaryDirectory(prefix="tflow_") as tmp_dir:
+            tmp_path = os.path.join(tmp_dir, "audio.wav")
+            with open(tmp_path, "wb") as tmp:
+                # Écrire par blocs de 1 Mo, via une vue mémoire: aucun bloc n'est recopié
+                view = memoryview(audio_data)
+                chunk_size = 1024 * 1024
+                for i in range(0, len(view), chunk_size):
+                    tmp.write(view[i:i + chunk_size])
 
-        logging.info(f"Fichier temporaire créé: {tmp_path} ({os.path.getsize(tmp_path)} bytes)")
+            # Vérifier que le fichier a la bonne taille
+            if os.path.getsize(tmp_path) == 0:
+                return False, "Erreur lors de la création du fichier temporaire."
 
-        progress_bar.progress(0.1)
-        status_text.text("Fichier prêt. Chargement du modèle Whisper...")
+            logging.info(f"Fichier temporaire créé: {tmp_path} ({os.path.getsize(tmp_path)} bytes)")
 
-        # Étape 2: Lancer la transcription
-        def progress_callback(progress, message):
-            progress_bar.progress(0.1 + progress * 0.8)
-            status_text.text(message)
+            # Étape 2: Lancer la transcription
+            status_text.text(f"Transcription en cours (modèle {whisper_model})...")
 
-        # Utiliser la version non-cachée pour les modèles lourds
-        if whisper_model in ["medium", "large"]:
-            result = transcribe_or_translate_locally(tmp_path, whisper_model, translate, progress_callback)
-        else:
-            # Utiliser la version cachée pour les modèles légers (tiny, base, small)
-            result = cached_transcribe(tmp_path, whisper_model, translate)
+            # Un audio déjà transcrit (même contenu, modèle et mode) ne repasse pas par Whisper
+            try:
+                result = cached_transcribe(content_digest(audio_data), tmp_path, whisper_model, translate)
+            except RuntimeError as e:
+                result = {"error": str(e)}
 
         # Étape 3: Traiter le résultat
-        progress_bar.progress(0.9)
-        status_text.text("Finalisation...")
-
-        # Nettoyage du fichier temporaire
-        try:
-            os.remove(tmp_path)
-        except Exception as e:
-            logging.warning(f"Impossible de supprimer le fichier temporaire: {tmp_path}, Erreur: {str(e)}")
-
         # Vérifier les erreurs
         if result.get("error"):
             progress_bar.progress(1.0)
@@ -192,24 +404,12 @@ def process_transcription_sync(
         st.session_state["segments"] = result["segments"]
         st.session_state["detected_language"] = result.get("language", "")
         st.session_state["transcription_completed"] = True
+        invalidate_transcription_quota(st.session_state["user_id"])
         st.session_state["last_transcription_time"] = int(time.time())
 
         # Terminer la barre de progression
         progress_bar.progress(1.0)
         status_text.text("Transcription terminée!")
-        time.sleep(0.5)  # Laisser le temps de voir le message
-
-        # Forcer le rafraîchissement pour afficher la transcription
-        st.markdown(
-            """
-            <script>
-            setTimeout(function() {
-                window.location.reload();
-            }, 1000);
-            </script>
-            """,
-            unsafe_allow_html=True
-        )
 
         duration_seconds = time.time() - start_time
         log_user_activity(
@@ -218,7 +418,7 @@ def process_transcription_sync(
             f"Modèle: {whisper_model}, Durée: {duration_seconds:.1f}s"
         )
 
-        # Essayer de forcer le rerun de Streamlit
+        # Rerun pour afficher la transcription (les résultats sont en session)
         st.rerun()
 
         return True, "Transcription terminée avec succès!"
@@ -234,10 +434,11 @@ def process_file_transcription_sync(file_path: str, whisper_model: str, translat
     """
     start_time = time.time()
 
-    if not os.path.exists(file_path):
+    file_stat = cached_file_stat(file_path)
+    if file_stat is None:
         return False, f"Fichier non trouvé: {file_path}"
 
-    file_size_mb = os.path.getsize(file_path) / (1024 * 1024)
+    file_size_mb = bytes_to_mb(file_stat.st_size)
     if file_size_mb > 1000:  # Si plus de 1 GB
         st.warning(f"Fichier volumineux détecté ({file_size_mb:.1f} MB). Le traitement peut prendre plus de temps.")
         optimize_memory_for_large_files()
@@ -246,20 +447,14 @@ def process_file_transcription_sync(file_path: str, whisper_model: str, translat
         # Créer la barre de progression
         progress_bar = st.progress(0)
         status_text = st.empty()
-        status_text.text("Préparation de la transcription...")
-
-        progress_bar.progress(0.1)
         status_text.text(f"Chargement du modèle Whisper {whisper_model}...")
 
-        # Utiliser directement le chemin du fichier
-        def progress_callback(progress, msg):
-            progress_bar.progress(0.1 + progress * 0.8)
-            status_text.text(msg)
-
         # Lancer la transcription directement sur le fichier
+        # (import local: voir cached_transcribe)
+        from core.transcription import transcribe_or_translate_locally
         result = transcribe_or_translate_locally(
             file_path, whisper_model, translate,
-            lambda p, msg: (progress_bar.progress(0.1 + p * 0.8), status_text.text(msg))
+            make_progress_callback(progress_bar, status_text)
         )
 
         # Vérifier les erreurs
@@ -281,6 +476,7 @@ def process_file_transcription_sync(file_path: str, whisper_model: str, translat
         st.session_state["segments"] = result["segments"]
         st.session_state["detected_language"] = result.get("language", "")
         st.session_state["transcription_completed"] = True
+        invalidate_transcription_quota(st.session_state["user_id"])
 
         # Enregistrer dans la base de données
         try:
@@ -328,19 +524,7 @@ def process_transcription_async(audio_data, whisper_model, translate=False):
         return False, "Aucun fichier audio fourni."
 
     try:
-        # Créer un fichier temporaire pour sauvegarder l'audio
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
-            tmp_path = tmp.name
-            tmp.write(audio_data)
-
-        # Vérifier que le fichier existe
-        if not os.path.exists(tmp_path) or os.path.getsize(tmp_path) == 0:
-            return False, "Erreur lors de la création du fichier temporaire."
-
-        logging.info(
-            f"Fichier temporaire pour traitement asynchrone créé: {tmp_path} ({os.path.getsize(tmp_path)} bytes)")
-
-        # Sauvegarder l'audio
+        # Sauvegarder l'audio (le worker lit cette copie: pas de fichier temporaire local)
         filename = f"audio_{int(time.time())}.wav"
         audio_path = storage_manager.save_audio_file(
             st.session_state["user_id"],
@@ -356,6 +540,8 @@ def process_transcription_async(audio_data, whisper_model, translate=False):
         # Si nous sommes ici, c'est que le stockage a fonctionné. On peut lancer la transcription
         try:
             # Demander la transcription asynchrone
+            # (import local: voir cached_transcribe)
+            from core.transcription import request_transcription
             task_id = request_transcription(
                 audio_path,
                 st.session_state["user_id"],
@@ -385,12 +571,13 @@ def process_file_transcription_async(file_path: str, whisper_model: str, transla
     """
     Version asynchrone pour les fichiers déjà sur le serveur
     """
-    if not os.path.exists(file_path):
+    file_stat = cached_file_stat(file_path)
+    if file_stat is None:
         return False, f"Fichier non trouvé: {file_path}"
 
     try:
         # Calculer la taille du fichier
-        file_size_mb = os.path.getsize(file_path) / (1024 * 1024)
+        file_size_mb = bytes_to_mb(file_stat.st_size)
         logging.info(f"Traitement asynchrone du fichier: {file_path} ({file_size_mb:.2f} MB)")
 
         # Utiliser le chemin du fichier directement sans le charger en mémoire
@@ -427,9 +614,91 @@ def estimate_processing_time(file_size_mb, model):
         return max(10, int(file_size_mb * 1.0 / 60))  # ~1000s par GB
 
 
-def run_gpt_summary(api_key, style="bullet", model="gpt-3.5-turbo", temperature=0.7):
-    """Génère un résumé du texte transcrit"""
-    text = get_session_value("transcribed_text", "")
+def text_digest(text: str) -> str:
+    """
+    Empreinte (content_digest) du texte transcrit, calculée une seule fois
+    par texte: la session garde le dernier texte haché et son empreinte,
+    réutilisée par tous les gestionnaires GPT d'un rerun à l'autre. La
+    comparaison des chaînes (identité, puis longueur, puis memcmp) reste bien
+    moins coûteuse que le hachage, même pour une copie du même texte.
+
+    Args:
+        text: Texte transcrit
+
+    Returns:
+        Empreinte hexadécimale
+    """
+    if get_session_value("text_digest_source") != text:
+        set_session_value("text_digest", content_digest(text.encode("utf-8")))
+        set_session_value("text_digest_source", text)
+    return get_session_value("text_digest")
+
+
+def gpt_cache_key(kind: str, model: str, text: str, *extra) -> Tuple:
+    """
+    Construit la clé de mémorisation d'un résultat GPT. Le texte transcrit est
+    réduit à son empreinte (voir text_digest) plutôt que conservé tel quel.
+
+    Args:
+        kind: Type de résultat ("summary", "keywords", "question")
+        model: Modèle GPT utilisé
+        text: Texte transcrit
+        *extra: Paramètres supplémentaires (style, température, question...)
+
+    Returns:
+        Clé hashable
+    """
+    return (kind, GPT_PROMPT_VERSION, model, text_digest(text), *extra)
+
+
+def get_cached_gpt_result(key: Tuple) -> Optional[str]:
+    """
+    Renvoie le résultat GPT mémorisé pour cette clé s'il a moins de GPT_CACHE_TTL
+    secondes (cache disque, voir core/gpt_cache.py).
+    Signale un succès de cache dans la session (clé "gpt_cache_hit").
+    """
+    result = gpt_result_cache.get(gpt_result_cache.make_key(*key), GPT_CACHE_TTL)
+    set_session_value("gpt_cache_hit", result is not None)
+    return result
+
+
+def store_gpt_result(key: Tuple, result: str) -> None:
+    """Mémorise un résultat GPT valide (les entrées expirées sont purgées par le cache disque)."""
+    if not result or result.startswith("Erreur"):
+        return
+
+    gpt_result_cache.set(gpt_result_cache.make_key(*key), result, GPT_CACHE_TTL)
+
+
+def render_stream(stream, placeholder) -> str:
+    """
+    Affiche une réponse GPT au fil de l'eau dans un placeholder Streamlit.
+    Le rendu markdown est regroupé (au plus un toutes les STREAM_REFRESH_INTERVAL
+    secondes) pour ne pas re-parser le texte à chaque morceau reçu.
+
+    Args:
+        stream: Itérateur de morceaux de texte
+        placeholder: Conteneur st.empty() où afficher le texte
+
+    Returns:
+        Texte complet de la réponse
+    """
+    parts = []
+    last_refresh = 0.0
+    for piece in stream:
+        parts.append(piece)
+        now = time.monotonic()
+        if now - last_refresh >= STREAM_REFRESH_INTERVAL:
+            placeholder.markdown("".join(parts))
+            last_refresh = now
+
+    return "".join(parts).strip()
+
+
+def run_gpt_summary(api_key, style="bullet", model="gpt-3.5-turbo", temperature=0.7, text=None):
+    """Génère un résumé du texte transcrit (lu dans la session si text n'est pas fourni)"""
+    if text is None:
+        text = get_session_value("transcribed_text", "")
 
     if not text:
         st.warning("Aucun texte à résumer. Veuillez d'abord faire une transcription.")
@@ -440,23 +709,35 @@ def run_gpt_summary(api_key, style="bullet", model="gpt-3.5-turbo", temperature=
         return False
 
     try:
+        # Résumé déjà généré pour ce texte avec les mêmes paramètres (clé calculée
+        # sur le texte de la session, avant le nettoyage qui en crée une copie)
+        cache_key = gpt_cache_key("summary", model, text, style, temperature)
+        summary = get_cached_gpt_result(cache_key)
+
         # Nettoyer le texte des caractères problématiques
         text = text.encode('utf-8', errors='replace').decode('utf-8')
 
-        with st.spinner("Génération du résumé en cours..."):
-            summary = summarize_text(
-                text=text,
-                api_key=api_key,
-                gpt_model=model,
-                temperature=temperature,
-                style=style
+        if summary is None:
+            # Affichage progressif du résumé pendant sa génération
+            placeholder = st.empty()
+            summary = render_stream(
+                summarize_text_stream(
+                    text=text,
+                    api_key=api_key,
+                    gpt_model=model,
+                    temperature=temperature,
+                    style=style
+                ),
+                placeholder
             )
+            placeholder.empty()
 
         # Vérifier si le résumé contient une erreur
         if summary.startswith("Erreur"):
             st.error(summary)
             return False
 
+        store_gpt_result(cache_key, summary)
         set_session_value("summary_result", summary)
         return True
     except Exception as e:
@@ -465,6 +746,128 @@ def run_gpt_summary(api_key, style="bullet", model="gpt-3.5-turbo", temperature=
         return False
 
 
+def run_gpt_all(api_key, style="bullet", model="gpt-3.5-turbo", temperature=0.7, text=None) -> bool:
+    """
+    Génère le résumé et les mots-clés du texte transcrit en parallèle (voir
+    core/async_gpt.py). Les résultats sont mémorisés comme ceux des boutons dédiés.
+    Le texte est lu dans la session s'il n'est pas fourni.
+    """
+    if text is None:
+        text = get_session_value("transcribed_text", "")
+
+    if not text:
+        st.warning("Aucun texte à analyser. Veuillez d'abord faire une transcription.")
+        return False
+
+    if not api_key:
+        st.error("Clé API OpenAI requise pour cette fonctionnalité.")
+        return False
+
+    try:
+        summary_key = gpt_cache_key("summary", model, text, style, temperature)
+        keywords_key = gpt_cache_key("keywords", model, text)
+        text = text.encode('utf-8', errors='replace').decode('utf-8')
+
+        results = {"summary": get_cached_gpt_result(summary_key), "keywords": get_cached_gpt_result(keywords_key)}
+        if None in results.values():
+            results = asyncio.run(run_all(api_key, text, model=model, temperature=temperature, style=style))
+
+        for result in results.values():
+            if result.startswith("Erreur"):
+                st.error(result)
+                return False
+
+        store_gpt_result(summary_key, results["summary"])
+        store_gpt_result(keywords_key, results["keywords"])
+        set_session_value("summary_result", results["summary"])
+        set_session_value("keywords_result", results["keywords"])
+        return True
+    except Exception as e:
+        handle_error(e, ErrorType.API_ERROR, "Erreur lors de la génération du résumé et des mots-clés.")
+        return False
+
+
+def submit_gpt_summary_batch(api_key, style="bullet", model="gpt-3.5-turbo", temperature=0.7,
+                             text=None) -> bool:
+    """
+    Soumet le résumé du texte transcrit à l'API Batch d'OpenAI (coût réduit de
+    moitié, résultat sous 24 h). Le lot est ajouté à la session (clé "pending_batches").
+    Le texte est lu dans la session s'il n'est pas fourni.
+    """
+    if text is None:
+        text = get_session_value("transcribed_text", "")
+
+    if not text:
+        st.warning("Aucun texte à résumer. Veuillez d'abord faire une transcription.")
+        return False
+
+    if not api_key:
+        st.error("Clé API OpenAI requise pour cette fonctionnalité.")
+        return False
+
+    try:
+        batch_id, chunk_count = submit_summary_batch(text, api_key, model, temperature, style)
+    except Exception as e:
+        st.error(f"Erreur lors de l'envoi du lot de résumé: {str(e)}")
+        logging.error(f"Exception dans submit_gpt_summary_batch: {str(e)}")
+        return False
+
+    pending = get_session_value("pending_batches", [])
+    pending.append({
+        "batch_id": batch_id,
+        "chunk_count": chunk_count,
+        "kind": "summary",
+        "model": model,
+        "temperature": temperature,
+        "style": style,
+        "cache_key": gpt_cache_key("summary", model, text, style, temperature),
+        "submitted_at": int(time.time()),
+    })
+    set_session_value("pending_batches", pending)
+    return True
+
+
+def check_pending_batches(api_key) -> int:
+    """
+    Vérifie les lots de résumé en attente; un résumé terminé est mémorisé et
+    devient le résumé courant.
+
+    Returns:
+        Nombre de lots terminés lors de cette vérification
+    """
+    still_pending = []
+    completed = 0
+    for batch in get_session_value("pending_batches", []):
+        try:
+            summary = collect_summary_batch(
+                batch["batch_id"], api_key, batch["chunk_count"],
+                gpt_model=batch["model"], temperature=batch["temperature"], style=batch["style"]
+            )
+        except RuntimeError as e:
+            # Lot échoué, expiré ou annulé: il ne sera jamais terminé
+            st.error(f"Lot {batch['batch_id']}: {str(e)}")
+            logging.error(f"Exception dans check_pending_batches: {str(e)}")
+            continue
+        except Exception as e:
+            # Erreur passagère (réseau, limite de débit...): nouvelle tentative plus tard
+            st.warning(f"Lot {batch['batch_id']} non vérifié, nouvelle tentative plus tard: {str(e)}")
+            logging.warning(f"Exception dans check_pending_batches: {str(e)}")
+            still_pending.append(batch)
+            continue
+
+        if summary is None:
+            still_pending.append(batch)
+        elif summary.startswith("Erreur"):
+            st.error(summary)
+        else:
+            store_gpt_result(batch["cache_key"], summary)
+            set_session_value("summary_result", summary)
+            completed += 1
+
+    set_session_value("pending_batches", still_pending)
+    return completed
+
+
 def optimize_whisper_for_limited_ram(model_name="base"):
     """Configure Whisper pour fonctionner avec une RAM limitée"""
     # Limiter l'utilisation de la mémoire pour les modèles whisper
@@ -483,18 +886,20 @@ def optimize_whisper_for_limited_ram(model_name="base"):
     return recommended_model
 
 
-def run_gpt_keywords(api_key: str, model: str = "gpt-3.5-turbo") -> bool:
+def run_gpt_keywords(api_key: str, model: str = "gpt-3.5-turbo", text: Optional[str] = None) -> bool:
     """
     Extrait les mots-clés du texte transcrit via GPT.
 
     Args:
         api_key: Clé API OpenAI
         model: Modèle GPT à utiliser
+        text: Texte transcrit (lu dans la session si absent)
 
     Returns:
         True si succès, False sinon
     """
-    text = get_session_value("transcribed_text", "")
+    if text is None:
+        text = get_session_value("transcribed_text", "")
     if not text:
         st.warning("Aucun texte pour extraire des mots-clés. Veuillez d'abord faire une transcription.")
         return False
@@ -504,8 +909,13 @@ def run_gpt_keywords(api_key: str, model: str = "gpt-3.5-turbo") -> bool:
         return False
 
     try:
-        with st.spinner("Extraction des mots-clés en cours..."):
-            keywords = extract_keywords(text, api_key, model=model)
+        cache_key = gpt_cache_key("keywords", model, text)
+        keywords = get_cached_gpt_result(cache_key)
+
+        if keywords is None:
+            with st.spinner("Extraction des mots-clés en cours..."):
+                keywords = extract_keywords(text, api_key, model=model)
+            store_gpt_result(cache_key, keywords)
 
         set_session_value("keywords_result", keywords)
         return True
@@ -516,7 +926,8 @@ def run_gpt_keywords(api_key: str, model: str = "gpt-3.5-turbo") -> bool:
         return False
 
 
-def run_gpt_question(question: str, api_key: str, model: str = "gpt-3.5-turbo") -> bool:
+def run_gpt_question(question: str, api_key: str, model: str = "gpt-3.5-turbo",
+                     text: Optional[str] = None) -> bool:
     """
     Pose une question au texte transcrit via GPT.
 
@@ -524,6 +935,7 @@ def run_gpt_question(question: str, api_key: str, model: str = "gpt-3.5-turbo")
         question: Question à poser
         api_key: Clé API OpenAI
         model: Modèle GPT à utiliser
+        text: Texte transcrit (lu dans la session si absent)
 
     Returns:
         True si succès, False sinon
@@ -533,7 +945,8 @@ def run_gpt_question(question: str, api_key: str, model: str = "gpt-3.5-turbo")
         st.warning("Vous pouvez obtenir une clé API sur openai.com/api")
         return False
 
-    text = get_session_value("transcribed_text", "")
+    if text is None:
+        text = get_session_value("transcribed_text", "")
     if not text:
         st.warning("Aucun texte pour poser une question. Veuillez d'abord faire une transcription.")
         return False
@@ -543,8 +956,19 @@ def run_gpt_question(question: str, api_key: str, model: str = "gpt-3.5-turbo")
         return False
 
     try:
-        with st.spinner("Traitement de la question en cours..."):
-            answer = ask_question_about_text(text, question, api_key, model=model)
+        # Même question (à la casse près) déjà posée sur ce texte
+        cache_key = gpt_cache_key("question", model, text, question.strip().lower())
+        answer = get_cached_gpt_result(cache_key)
+
+        if answer is None:
+            # Affichage progressif de la réponse pendant sa génération
+            placeholder = st.empty()
+            answer = render_stream(
+                gpt_request_stream(build_question_prompt(text, question), api_key, model=model),
+                placeholder
+            )
+            placeholder.empty()
+            store_gpt_result(cache_key, answer)
 
         set_session_value("answer_result", answer)
         return True
@@ -555,25 +979,57 @@ def run_gpt_question(question: str, api_key: str, model: str = "gpt-3.5-turbo")
         return False
 
 
-def create_text_chapters(chunk_duration: float = 60.0) -> bool:
+def segments_digest(segments: SegmentColumns) -> str:
+    """
+    Empreinte des segments (débuts, fins, textes), utilisée comme clé de
+    cache à la place des segments eux-mêmes.
+    """
+    starts, ends, texts = segment_columns(segments)
+    hasher = content_hasher()
+    hasher.update(starts.tobytes())
+    hasher.update(ends.tobytes())
+    hasher.update("\x1e".join(texts).encode("utf-8"))
+    return hasher.hexdigest()
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def compute_chapter_plan(seg_digest: str, chunk_duration: float, _segments: SegmentColumns) -> str:
+    """
+    Calcule (et met en cache) le texte des chapitres pour des segments et une durée donnés.
+    Les segments ne sont pas hachés par Streamlit (paramètre préfixé par "_"):
+    la clé de cache repose sur leur empreinte seg_digest.
+
+    Args:
+        seg_digest: Empreinte des segments (voir segments_digest)
+        chunk_duration: Durée en secondes pour chaque chapitre
+        _segments: Segments de transcription
+
+    Returns:
+        Chapitres, un par ligne
+    """
+    return "\n".join(create_chapters_from_segments(_segments, chunk_duration=chunk_duration))
+
+
+def create_text_chapters(chunk_duration: float = 60.0, segments: Optional[SegmentColumns] = None) -> bool:
     """
     Crée des chapitres à partir des segments de transcription.
 
     Args:
         chunk_duration: Durée en secondes pour chaque chapitre
+        segments: Segments de la transcription (lus dans la session si absents)
 
     Returns:
         True si succès, False sinon
     """
-    segments = get_session_value("segments", [])
-    if not segments:
+    if segments is None:
+        segments = get_session_value("segments", [])
+    if not len(segment_columns(segments)[2]):
         st.warning("Aucun segment disponible. Veuillez faire une transcription avant.")
         return False
 
     try:
         with st.spinner("Création des chapitres en cours..."):
-            chapters = create_chapters_from_segments(segments, chunk_duration=chunk_duration)
-            chapter_text = "\n".join(chapters)
+            chapter_text = compute_chapter_plan(segments_digest(segments), chunk_duration, segments)
 
         set_session_value("chapters_result", chapter_text)
         return True
@@ -586,7 +1042,8 @@ def create_text_chapters(chunk_duration: float = 60.0) -> bool:
 
 def export_text_to_file(text: str, filename: str) -> bool:
     """
-    Exporte du texte vers un fichier et propose le téléchargement.
+    Propose le téléchargement du texte et, si un dossier d'export est
+    renseigné, l'enregistre aussi dans ce dossier.
 
     Args:
         text: Texte à exporter
@@ -600,10 +1057,8 @@ def export_text_to_file(text: str, filename: str) -> bool:
         return False
 
     try:
-        export_folder = get_session_value("export_folder", "")
-        path = export_text_file(text, export_folder, filename)
-
-        # Propose le téléchargement direct
+        # Téléchargement direct d'abord: le texte est déjà en mémoire, le
+        # bouton ne dépend pas de l'écriture sur disque
         st.download_button(
             label="Télécharger le fichier",
             data=text.encode("utf-8"),
@@ -611,6 +1066,12 @@ def export_text_to_file(text: str, filename: str) -> bool:
             mime="text/plain"
         )
 
+        # Copie sur disque uniquement si l'utilisateur a choisi un dossier
+        export_folder = get_session_value("export_folder", "")
+        if export_folder:
+            path = export_text_file(text, export_folder, filename)
+            st.caption(f"Fichier enregistré: {path}")
+
         return True
 
     except Exception as e:
@@ -619,18 +1080,148 @@ def export_text_to_file(text: str, filename: str) -> bool:
         return False
 
 
+def render_transcribed_text(height: int) -> str:
+    """
+    Affiche la langue détectée et la transcription modifiable, et enregistre
+    les modifications dans la session.
+
+    Une transcription plus longue que TRANSCRIPT_PREVIEW_CHARS n'est envoyée en
+    entier au navigateur (à chaque rerun) que si l'utilisateur choisit de la
+    modifier; sinon seul un aperçu tronqué est affiché.
+
+    Args:
+        height: Hauteur de la zone de texte en pixels
+
+    Returns:
+        Texte transcrit à jour
+    """
+    transcribed_text = get_session_value("transcribed_text", "")
+    detected_language = get_session_value("detected_language", "")
+
+    if detected_language:
+        st.info(f"Langue détectée: {detected_language}")
+
+    if len(transcribed_text) > TRANSCRIPT_PREVIEW_CHARS and not st.toggle(
+            "Modifier la transcription", key="transcription_edit"):
+        st.text_area(
+            "Transcription (aperçu)",
+            value=transcribed_text[:TRANSCRIPT_PREVIEW_CHARS] + "…",
+            height=height,
+            disabled=True
+        )
+        st.caption(f"{TRANSCRIPT_PREVIEW_CHARS} premiers caractères sur {len(transcribed_text)}: "
+                   "activez « Modifier la transcription » pour afficher le texte complet.")
+        return transcribed_text
+
+    text_area = st.text_area(
+        "Transcription",
+        value=transcribed_text,
+        height=height,
+        key="transcription_textarea"
+    )
+
+    # Si modifié, mettre à jour
+    if text_area != transcribed_text:
+        set_session_value("transcribed_text", text_area)
+    return text_area
+
+
 def model_format_func(model_id):
     """Formate l'affichage des modèles dans le selectbox"""
-    model_info = GPT_MODELS.get(model_id, {})
+    model_info = GPT_MODELS.get(model_id, EMPTY_MODEL_INFO)
     return f"{model_info.get('name', model_id)} - {model_info.get('speed', '')}"
 
 
+@st.cache_data(show_spinner=False)
+def render_keyword_badges(keywords_result: str) -> str:
+    """
+    Construit le HTML des badges de mots-clés, mis en cache pour ne pas le
+    reconstruire à chaque rerun.
+
+    Args:
+        keywords_result: Mots-clés séparés par des virgules
+
+    Returns:
+        HTML des badges (styles de la classe kw-badge, définie dans app.py)
+    """
+    return "".join(
+        f"<span class='kw-badge'>{keyword}</span>"
+        for keyword in (k.strip() for k in keywords_result.split(','))
+        if keyword
+    )
+
+
+@st.cache_data(show_spinner=False)
+def render_chapter_timeline(chapters_result: str) -> str:
+    """
+    Construit le HTML complet de la chronologie des chapitres, affiché en un
+    seul appel st.markdown et mis en cache par texte de chapitres.
+
+    Args:
+        chapters_result: Chapitres au format "[Chapitre N] à MM:SS => texte", un par ligne
+
+    Returns:
+        HTML de la chronologie, stylé par les classes chap-row, chap-time et
+        chap-text définies dans app.py. Une ligne qui n'a pas le format
+        attendu est affichée telle quelle.
+    """
+    rows = []
+    for chapter in chapters_result.strip().split('\n'):
+        # Extraction du timecode
+        match = CHAPTER_LINE_RE.search(chapter)
+        if not match:
+            # Fallback si le format n'est pas celui attendu
+            rows.append(f"<p>{chapter}</p>")
+            continue
+        time_part, text_part = match.group(1), match.group(2).strip()
+        rows.append(
+            f"<div class='chap-row'><div class='chap-time'>{time_part}</div>"
+            f"<div class='chap-text'>{text_part}</div></div>"
+        )
+    return "".join(rows)
+
+
+def restore_last_transcription() -> None:
+    """
+    Recharge dans la session la dernière transcription de l'utilisateur
+    enregistrée en base, si la session n'en a pas encore (nouvelle session,
+    serveur redémarré): le texte est retrouvé sans refaire la transcription.
+    Une seule tentative par session. Les segments ne sont pas conservés en
+    base: les chapitres demandent une nouvelle transcription.
+    """
+    user_id = st.session_state.get("user_id")
+    if not user_id or get_session_value("transcription_restored"):
+        return
+    set_session_value("transcription_restored", True)
+
+    if get_session_value("transcribed_text", ""):
+        return
+
+    try:
+        db = next(get_db())
+        try:
+            last = db.query(Transcription).filter(
+                Transcription.user_id == user_id
+            ).order_by(Transcription.created_at.desc()).first()
+        finally:
+            db.close()
+    except Exception as e:
+        logging.error(f"Erreur lors de la lecture de la dernière transcription: {str(e)}")
+        return
+
+    if last and last.text:
+        set_session_value("transcribed_text", last.text)
+
+
 def afficher_page_4():
     st.title("Transcription / Traduction")
 
     # Détection mobile
     is_mobile = st.session_state.get("is_mobile", False)
 
+    # Reprendre la dernière transcription si la session a été perdue
+    restore_last_transcription()
+
     # Importer les vérifications des quotas du plan
     from core.plan_manager import PlanManager
 
@@ -682,7 +1273,7 @@ def afficher_page_4():
 
             audio_file = st.file_uploader(
                 "Charger un fichier audio",
-                type=["wav", "mp3", "m4a", "ogg"]
+                type=["wav", "mp3", "m4a", "ogg", "flac"]
             )
 
             # Après les options existantes (audio_file), ajoutez:
@@ -697,18 +1288,19 @@ def afficher_page_4():
 
             # Vérification et prévisualisation du fichier spécifié
             if server_audio_path:
-                if os.path.exists(server_audio_path):
-                    file_size_mb = os.path.getsize(server_audio_path) / (1024 * 1024)
+                server_stat = cached_file_stat(server_audio_path)
+                if server_stat is not None:
+                    file_size_mb = bytes_to_mb(server_stat.st_size)
                     st.success(f"✅ Fichier trouvé: {os.path.basename(server_audio_path)} ({file_size_mb:.2f} MB)")
 
                     # Prévisualisation audio si possible
                     try:
                         # Créer un aperçu du fichier audio (premiers 10MB)
                         with open(server_audio_path, "rb") as f:
-                            preview_bytes = f.read(10 * 1024 * 1024)  # 10MB max pour prévisualisation
+                            preview_bytes = f.read(min(10 * 1024 * 1024, server_stat.st_size))  # 10MB max pour prévisualisation
 
                         st.audio(preview_bytes, format=f"audio/{os.path.splitext(server_audio_path)[1][1:]}")
-                    except:
+                    except Exception:
                         st.info("Aperçu audio non disponible")
 
                     # Définir la source
@@ -880,12 +1472,13 @@ def afficher_page_4():
                     st.rerun()
 
             if audio_file:
-                file_size_mb = audio_file.size / (1024 * 1024)
+                file_size_mb = bytes_to_mb(audio_file.size)
                 if "user_id" in st.session_state:
                     if not PlanManager.check_file_size_limit(st.session_state["user_id"], file_size_mb):
                         st.warning(f"Ce fichier ({file_size_mb:.1f} MB) dépasse la limite de votre forfait.")
-                audio_data = audio_file.read()
-                st.audio(audio_data, format=f"audio/{audio_file.type.split('/')[1]}")
+                # Vue mémoire sur le contenu déjà reçu: aucune copie à chaque rerun
+                audio_data = audio_file.getbuffer()
+                st.audio(get_audio_preview_path(audio_file), format=f"audio/{audio_file.type.split('/')[1]}")
                 st.info(f"Taille: {file_size_mb:.1f} MB")
 
             # Bouton de transcription
@@ -898,23 +1491,7 @@ def afficher_page_4():
 
             # Affichage des résultats
             st.subheader("Texte transcrit")
-
-            transcribed_text = get_session_value("transcribed_text", "")
-            detected_language = get_session_value("detected_language", "")
-
-            if detected_language:
-                st.info(f"Langue détectée: {detected_language}")
-
-            text_area = st.text_area(
-                "Transcription",
-                value=transcribed_text,
-                height=250,
-                key="transcription_textarea"
-            )
-
-            # Si modifié, mettre à jour
-            if text_area != transcribed_text:
-                set_session_value("transcribed_text", text_area)
+            transcribed_text = render_transcribed_text(height=250)
 
             # Options d'export simplifiées pour mobile
             if transcribed_text:
@@ -968,12 +1545,12 @@ def afficher_page_4():
                 # Option 2: Upload direct
                 audio_file = st.file_uploader(
                     "Ou chargez un fichier audio",
-                    type=["wav", "mp3", "m4a", "ogg"],
+                    type=["wav", "mp3", "m4a", "ogg", "flac"],
                     help="Formats supportés: WAV, MP3, M4A, OGG"
                 )
 
                 if audio_file:
-                    file_size_mb = audio_file.size / (1024 * 1024)
+                    file_size_mb = bytes_to_mb(audio_file.size)
 
                     # Vérifier la taille du fichier
                     if "user_id" in st.session_state:
@@ -981,8 +1558,9 @@ def afficher_page_4():
                             st.warning(
                                 f"Ce fichier ({file_size_mb:.1f} MB) dépasse la limite de votre forfait. Veuillez passer à un forfait supérieur.")
 
-                    audio_data = audio_file.read()
-                    st.audio(audio_data, format=f"audio/{audio_file.type.split('/')[1]}")
+                    # Vue mémoire sur le contenu déjà reçu: aucune copie à chaque rerun
+                    audio_data = audio_file.getbuffer()
+                    st.audio(get_audio_preview_path(audio_file), format=f"audio/{audio_file.type.split('/')[1]}")
                     st.info(f"Taille du fichier: {file_size_mb:.1f} MB")
 
                 # Option 3: Fichier sur le serveur (alternative pour les gros fichiers)
@@ -995,18 +1573,19 @@ def afficher_page_4():
 
                 # Vérification du fichier serveur
                 if server_audio_path:
-                    if os.path.exists(server_audio_path):
-                        file_size_mb = os.path.getsize(server_audio_path) / (1024 * 1024)
+                    server_stat = cached_file_stat(server_audio_path)
+                    if server_stat is not None:
+                        file_size_mb = bytes_to_mb(server_stat.st_size)
                         st.success(f"✅ Fichier trouvé: {os.path.basename(server_audio_path)} ({file_size_mb:.2f} MB)")
 
                         # Prévisualisation audio si possible
                         try:
                             # Créer un aperçu du fichier audio (premiers 10MB)
                             with open(server_audio_path, "rb") as f:
-                                preview_bytes = f.read(min(10 * 1024 * 1024, os.path.getsize(server_audio_path)))
+                                preview_bytes = f.read(min(10 * 1024 * 1024, server_stat.st_size))
 
                             st.audio(preview_bytes, format=f"audio/{os.path.splitext(server_audio_path)[1][1:]}")
-                        except:
+                        except Exception:
                             st.info("Aperçu audio non disponible")
 
                         # Définir la source
@@ -1183,9 +1762,9 @@ def afficher_page_4():
                 # Vérifier si des données audio ont été enregistrées
                 # Dans la partie où vous traitez l'audio enregistré
                 audio_from_mic = False
-                if 'recordedAudioData' in st.session_state:
-                    audio_base64 = st.session_state['recordedAudioData']
-
+                # Récupérer et retirer les données en une seule opération pour éviter de répéter le traitement
+                audio_base64 = st.session_state.pop('recordedAudioData', None)
+                if audio_base64:
                     # Convertir de base64 à bytes
                     audio_bytes = base64.b64decode(audio_base64)
 
@@ -1196,16 +1775,12 @@ def afficher_page_4():
                     set_session_value("audio_bytes_for_transcription", audio_bytes)
                     audio_data = audio_bytes  # Mettre à jour audio_data pour qu'il soit disponible
                     audio_from_mic = True
-                    # Nettoyer pour éviter de répéter l'opération
-                    st.session_state.pop('recordedAudioData', None)
                     # Vérifier les quotas
                     if "user_id" in st.session_state:
-                        if not PlanManager.check_transcription_quota(st.session_state["user_id"]):
+                        if not check_transcription_quota_cached(st.session_state["user_id"]):
                             st.error("Vous avez atteint votre quota de transcription pour ce mois.")
                         else:
                             # Lancer directement la transcription
-                            file_size_mb = len(audio_bytes) / (1024 * 1024)
-
                             # Choix du modèle de transcription (utiliser celui sélectionné dans l'interface)
                             selected_model = whisper_model
                             translate = translate_checkbox
@@ -1220,35 +1795,14 @@ def afficher_page_4():
 
                                 if success:
                                     st.success(message)
-                                    # Nettoyer après usage
-                                    st.session_state.pop('recordedAudioData', None)
                                 else:
                                     st.error(message)
                     else:
                         st.error("Erreur de session. Veuillez vous reconnecter.")
-
-                    # Supprimer les données pour éviter de répéter l'opération au prochain chargement
-                    st.session_state.pop('recordedAudioData', None)
             with col2:
                 # Affichage des résultats
                 st.subheader("Texte transcrit")
-
-                transcribed_text = get_session_value("transcribed_text", "")
-                detected_language = get_session_value("detected_language", "")
-
-                if detected_language:
-                    st.info(f"Langue détectée: {detected_language}")
-
-                text_area = st.text_area(
-                    "Transcription",
-                    value=transcribed_text,
-                    height=350,
-                    key="transcription_textarea"
-                )
-
-                # Si modifié, mettre à jour
-                if text_area != transcribed_text:
-                    set_session_value("transcribed_text", text_area)
+                transcribed_text = render_transcribed_text(height=350)
 
                 # Options d'export
                 if transcribed_text:
@@ -1280,20 +1834,21 @@ def afficher_page_4():
             if transcribe_mic_button:
                 transcribe_button = True  # Activer le processus de transcription
         # Traitement du bouton de transcription (identique pour les deux layouts)
-        if 'transcribe_button' in locals() and transcribe_button:
+        if transcribe_button:
             # Vérifier les quotas
             if "user_id" in st.session_state:
-                if not PlanManager.check_transcription_quota(st.session_state["user_id"]):
+                if not check_transcription_quota_cached(st.session_state["user_id"]):
                     st.error("Vous avez atteint votre quota de transcription pour ce mois.")
                 else:
                     # Vérifier d'abord si on a un chemin de fichier serveur
                     server_path = get_session_value("server_audio_path_for_transcription", "")
-                    if server_path and os.path.exists(server_path):
+                    server_stat = cached_file_stat(server_path) if server_path else None
+                    if server_stat is not None:
                         # Pour les gros fichiers, on passe directement le chemin sans charger tout en mémoire
                         logging.info(f"Utilisation du fichier audio depuis le chemin: {server_path}")
 
                         # Force le traitement asynchrone pour les fichiers > 1GB
-                        file_size_mb = os.path.getsize(server_path) / (1024 * 1024)
+                        file_size_mb = bytes_to_mb(server_stat.st_size)
                         force_async = file_size_mb > 1000
 
                         if force_async and not use_async:
@@ -1325,22 +1880,15 @@ def afficher_page_4():
 
                     # Sinon, on utilise les anciennes méthodes
                     else:
-                        # Récupérer l'audio à transcrire, en priorité à partir de audio_data
-                        data_to_transcribe = None
-
-                        # D'abord vérifier si on a de l'audio en session
-                        if audio_data:
-                            data_to_transcribe = audio_data
-                            logging.info(f"Utilisation de l'audio depuis la session: {len(data_to_transcribe)} bytes")
-                        # Sinon, utiliser le fichier uploadé s'il existe
-                        elif audio_file:
-                            data_to_transcribe = audio_file.read()
-                            logging.info(
-                                f"Utilisation de l'audio depuis le fichier uploadé: {len(data_to_transcribe)} bytes")
+                        # audio_data contient déjà l'audio de session ou le fichier uploadé (lu une seule
+                        # fois plus haut): on ne relit jamais le fichier pour éviter une seconde copie
+                        data_to_transcribe = audio_data
 
                         if data_to_transcribe:
+                            logging.info(f"Utilisation de l'audio chargé: {len(data_to_transcribe)} bytes")
+
                             # Déterminer si on force le traitement asynchrone pour les gros fichiers
-                            file_size_mb = len(data_to_transcribe) / (1024 * 1024)
+                            file_size_mb = bytes_to_mb(len(data_to_transcribe))
                             force_async = file_size_mb > 1000
 
                             if force_async and not use_async:
@@ -1380,31 +1928,9 @@ def afficher_page_4():
             else:
                 st.error("Erreur de session. Veuillez vous reconnecter.")
 
-        # Vérifier le statut des tâches en cours
+        # Vérifier le statut des tâches en cours (rerun limité au fragment)
         if "transcription_task_id" in st.session_state:
-            task_id = st.session_state["transcription_task_id"]
-            status, result = check_transcription_status(task_id)
-
-            status_container = st.container()
-
-            if status == "PENDING":
-                status_container.warning("Transcription en attente de traitement...")
-            elif status == "STARTED":
-                status_container.info("Transcription en cours...")
-            elif status == "SUCCESS":
-                status_container.success("Transcription terminée avec succès!")
-                # Mettre à jour la session avec le résultat
-                set_session_value("transcribed_text", result["text"])
-                set_session_value("detected_language", result.get("language", ""))
-                # Supprimer l'ID de tâche de la session
-                del st.session_state["transcription_task_id"]
-                # Forcer le rafraîchissement
-                st.rerun()
-            elif status == "FAILURE":
-                status_container.error("La transcription a échoué. Veuillez réessayer.")
-                if st.button("Effacer la tâche"):
-                    del st.session_state["transcription_task_id"]
-                    st.rerun()
+            poll_transcription_status()
 
     # Implémentation des autres onglets (Résumé, Mots-clés, Questions/Réponses, Chapitres)
     with tabs[1]:  # Onglet Résumé
@@ -1423,7 +1949,7 @@ def afficher_page_4():
             return
 
         # Vérifier si une clé API est configurée
-        api_key = api_key_manager.get_key("openai")
+        api_key = openai_api_key
         if not api_key:
             st.error("❌ Clé API OpenAI manquante. Configurez votre clé API dans le menu 'API Clés'.")
             st.info("ℹ️ Obtenez une clé API sur https://platform.openai.com/api-keys")
@@ -1459,17 +1985,13 @@ def afficher_page_4():
                     "Style de résumé",
                     ["bullet", "concise", "detailed"],
                     horizontal=True,
-                    format_func=lambda x: {
-                        "bullet": "Liste à puces",
-                        "concise": "Concis (quelques phrases)",
-                        "detailed": "Détaillé (paragraphes)"
-                    }.get(x, x)
+                    format_func=SUMMARY_STYLE_LABELS.get
                 )
 
             # Sélection du modèle GPT
             gpt_model = st.selectbox(
                 "Modèle GPT",
-                options=list(GPT_MODELS.keys()),
+                options=GPT_MODEL_KEYS,
                 index=0,
                 format_func=model_format_func,
                 help="Sélectionnez le modèle GPT à utiliser"
@@ -1483,31 +2005,60 @@ def afficher_page_4():
                 type="primary",
                 use_container_width=True
             )
+            generate_all_button = st.button(
+                "Tout générer",
+                help="Résumé et mots-clés générés en parallèle",
+                use_container_width=True
+            )
 
             # Information sur le coût
-            selected_model_info = GPT_MODELS.get(gpt_model, {})
+            selected_model_info = GPT_MODELS.get(gpt_model, EMPTY_MODEL_INFO)
             st.caption(f"Coût estimé: {selected_model_info.get('cost', 'Inconnu')}")
 
+            use_batch = st.checkbox(
+                "Mode différé (-50 %)",
+                help="Envoie le résumé à l'API Batch d'OpenAI: coût réduit de moitié, résultat sous 24 h"
+            )
+
         # Afficher la barre de séparation
         st.divider()
 
+        # Résumés soumis en mode différé
+        pending_batches = get_session_value("pending_batches", [])
+        if pending_batches:
+            st.info(f"⏳ {len(pending_batches)} résumé(s) en attente de traitement par l'API Batch.")
+            if st.button("Vérifier les résumés en attente"):
+                with st.spinner("Vérification des lots en cours..."):
+                    if check_pending_batches(api_key):
+                        st.session_state["_summary_stamp"] = int(time.time())
+                        st.success("✅ Résumé différé récupéré!")
+
         # Résultat existant ou traitement de la génération
         summary_result = get_session_value("summary_result", "")
 
-        if generate_button:
+        if generate_all_button:
+            with st.spinner("Génération du résumé et des mots-clés en cours..."):
+                if run_gpt_all(api_key, summary_style, gpt_model, text=transcribed_text):
+                    summary_result = get_session_value("summary_result", "")
+                    st.session_state["_summary_stamp"] = int(time.time())
+                    st.success("✅ Résumé et mots-clés générés avec succès!")
+        elif generate_button and use_batch:
+            if submit_gpt_summary_batch(api_key, summary_style, gpt_model, text=transcribed_text):
+                st.success("✅ Résumé envoyé en mode différé. Revenez le vérifier plus tard.")
+        elif generate_button:
             with st.spinner("Génération du résumé en cours..."):
-                if run_gpt_summary(api_key, summary_style, gpt_model):
+                if run_gpt_summary(api_key, summary_style, gpt_model, text=transcribed_text):
                     summary_result = get_session_value("summary_result", "")
+                    # Nouvel horodatage pour le nom du fichier exporté
+                    st.session_state["_summary_stamp"] = int(time.time())
                     st.success("✅ Résumé généré avec succès!")
+                    if get_session_value("gpt_cache_hit"):
+                        st.caption("⚡ Résultat repris du cache, sans nouvel appel à l'API.")
 
         # Affichage du résultat
         if summary_result:
             # Titre dynamique selon le style
-            summary_title = {
-                "bullet": "Résumé en points clés",
-                "concise": "Résumé concis",
-                "detailed": "Résumé détaillé"
-            }.get(summary_style, "Résumé")
+            summary_title = SUMMARY_TITLES.get(summary_style, "Résumé")
 
             # Affichage du résumé
             st.subheader(summary_title)
@@ -1519,7 +2070,7 @@ def afficher_page_4():
                 st.download_button(
                     label="Télécharger en TXT",
                     data=summary_result,
-                    file_name=f"resume_{int(time.time())}.txt",
+                    file_name=f"resume_{st.session_state.setdefault('_summary_stamp', int(time.time()))}.txt",
                     mime="text/plain",
                     use_container_width=True
                 )
@@ -1545,7 +2096,7 @@ def afficher_page_4():
             return
 
         # Vérifier si une clé API est configurée
-        api_key = api_key_manager.get_key("openai")
+        api_key = openai_api_key
         if not api_key:
             st.error("❌ Clé API OpenAI manquante. Configurez votre clé API dans le menu 'API Clés'.")
             st.info("ℹ️ Obtenez une clé API sur https://platform.openai.com/api-keys")
@@ -1557,7 +2108,7 @@ def afficher_page_4():
         with col1:
             gpt_model = st.selectbox(
                 "Modèle GPT",
-                options=list(GPT_MODELS.keys()),
+                options=GPT_MODEL_KEYS,
                 index=0,
                 format_func=model_format_func,
                 help="Sélectionnez le modèle GPT à utiliser",
@@ -1574,7 +2125,7 @@ def afficher_page_4():
             )
 
             # Information sur le coût
-            selected_model_info = GPT_MODELS.get(gpt_model, {})
+            selected_model_info = GPT_MODELS.get(gpt_model, EMPTY_MODEL_INFO)
             st.caption(f"Coût estimé: {selected_model_info.get('cost', 'Inconnu')}")
 
         # Afficher la barre de séparation
@@ -1585,22 +2136,20 @@ def afficher_page_4():
 
         if extract_button:
             with st.spinner("Extraction des mots-clés en cours..."):
-                if run_gpt_keywords(api_key, gpt_model):
+                if run_gpt_keywords(api_key, gpt_model, text=transcribed_text):
                     keywords_result = get_session_value("keywords_result", "")
+                    # Nouvel horodatage pour le nom du fichier exporté
+                    st.session_state["_keywords_stamp"] = int(time.time())
                     st.success("✅ Mots-clés extraits avec succès!")
+                    if get_session_value("gpt_cache_hit"):
+                        st.caption("⚡ Résultat repris du cache, sans nouvel appel à l'API.")
 
         # Affichage du résultat
         if keywords_result:
             st.subheader("Mots-clés extraits")
 
-            # Traitement des mots-clés pour un affichage plus attrayant
-            keywords_list = [k.strip() for k in keywords_result.split(',')]
-
             # Affichage sous forme de badges
-            html_tags = ""
-            for keyword in keywords_list:
-                if keyword:
-                    html_tags += f'<span style="background-color:#1E90FF; color:white; padding:5px 10px; margin:5px; border-radius:15px; display:inline-block;">{keyword}</span>'
+            html_tags = render_keyword_badges(keywords_result)
 
             st.markdown(f"<div style='margin:10px 0;'>{html_tags}</div>", unsafe_allow_html=True)
 
@@ -1613,7 +2162,7 @@ def afficher_page_4():
                 st.download_button(
                     label="Télécharger en TXT",
                     data=keywords_result,
-                    file_name=f"mots_cles_{int(time.time())}.txt",
+                    file_name=f"mots_cles_{st.session_state.setdefault('_keywords_stamp', int(time.time()))}.txt",
                     mime="text/plain",
                     use_container_width=True
                 )
@@ -1634,7 +2183,7 @@ def afficher_page_4():
             return
 
         # Vérifier si une clé API est configurée
-        api_key = api_key_manager.get_key("openai")
+        api_key = openai_api_key
         if not api_key:
             st.error("❌ Clé API OpenAI manquante. Configurez votre clé API dans le menu 'API Clés'.")
             st.info("ℹ️ Obtenez une clé API sur https://platform.openai.com/api-keys")
@@ -1655,7 +2204,7 @@ def afficher_page_4():
             # Modèle
             gpt_model = st.selectbox(
                 "Modèle GPT",
-                options=list(GPT_MODELS.keys()),
+                options=GPT_MODEL_KEYS,
                 index=0,
                 format_func=model_format_func,
                 help="Sélectionnez le modèle GPT à utiliser",
@@ -1671,7 +2220,7 @@ def afficher_page_4():
             )
 
             # Information sur le coût
-            selected_model_info = GPT_MODELS.get(gpt_model, {})
+            selected_model_info = GPT_MODELS.get(gpt_model, EMPTY_MODEL_INFO)
             st.caption(f"Coût estimé: {selected_model_info.get('cost', 'Inconnu')}")
 
         # Afficher la barre de séparation
@@ -1683,11 +2232,13 @@ def afficher_page_4():
 
         if ask_button and question_input.strip():
             with st.spinner("Analyse de la question en cours..."):
-                if run_gpt_question(question_input, api_key, gpt_model):
+                if run_gpt_question(question_input, api_key, gpt_model, text=transcribed_text):
                     answer_result = get_session_value("answer_result", "")
                     set_session_value("last_question", question_input)
                     last_question = question_input
                     st.success("✅ Réponse générée avec succès!")
+                    if get_session_value("gpt_cache_hit"):
+                        st.caption("⚡ Résultat repris du cache, sans nouvel appel à l'API.")
 
         # Affichage du résultat
         if answer_result and last_question:
@@ -1710,14 +2261,23 @@ def afficher_page_4():
             # Historique et nouvelle question
             st.markdown("##### Historique des questions")
 
-            # Récupérer l'historique des questions/réponses
-            qa_history = get_session_value("qa_history", [])
+            # Récupérer l'historique des questions/réponses (borné à QA_HISTORY_MAXLEN entrées)
+            qa_history = get_session_value("qa_history")
+            if not isinstance(qa_history, deque):
+                qa_history = deque(qa_history or (), maxlen=QA_HISTORY_MAXLEN)
+                set_session_value("qa_history", qa_history)
+                set_session_value("qa_seen", {(qa["question"], qa["answer"]) for qa in qa_history})
+            qa_seen = get_session_value("qa_seen")
 
             # Vérifier si la dernière question/réponse est déjà dans l'historique
-            current_qa = {"question": last_question, "answer": answer_result}
-            if not qa_history or qa_history[-1] != current_qa:
-                qa_history.append(current_qa)
-                set_session_value("qa_history", qa_history)
+            qa_key = (last_question, answer_result)
+            if qa_key not in qa_seen:
+                if len(qa_history) == qa_history.maxlen:
+                    # L'entrée la plus ancienne va sortir du deque
+                    oldest = qa_history[0]
+                    qa_seen.discard((oldest["question"], oldest["answer"]))
+                qa_seen.add(qa_key)
+                qa_history.append({"question": last_question, "answer": answer_result})
 
             # Afficher l'historique des questions sous forme d'accordéon
             if qa_history:
@@ -1731,7 +2291,8 @@ def afficher_page_4():
 
         # Vérifier si une transcription existe avec segments
         segments = get_session_value("segments", [])
-        if not segments:
+        segment_ends = segment_columns(segments)[1]
+        if not len(segment_ends):
             st.warning("⚠️ Aucun segment de transcription disponible. Veuillez d'abord effectuer une transcription.")
             return
 
@@ -1749,7 +2310,7 @@ def afficher_page_4():
                 help="Durée cible pour chaque chapitre"
             )
 
-            total_duration = segments[-1]["end"] if segments else 0
+            total_duration = float(segment_ends[-1])
             estimated_chapters = max(1, int(total_duration / chunk_duration))
             st.caption(f"Estimation: environ {estimated_chapters} chapitres pour {total_duration:.1f} secondes d'audio")
 
@@ -1770,48 +2331,23 @@ def afficher_page_4():
 
         if generate_button:
             with st.spinner("Génération des chapitres en cours..."):
-                if create_text_chapters(chunk_duration):
+                if create_text_chapters(chunk_duration, segments):
                     chapters_result = get_session_value("chapters_result", "")
+                    # Nouvel horodatage pour le nom du fichier exporté
+                    st.session_state["_chapters_stamp"] = int(time.time())
                     st.success("✅ Chapitres générés avec succès!")
 
         # Affichage du résultat
         if chapters_result:
             st.subheader("Chapitres générés")
 
-            # Traitement des chapitres pour un affichage plus attrayant
-            chapters_list = chapters_result.strip().split('\n')
-
-            # Affichage sous forme de chronologie
-            for i, chapter in enumerate(chapters_list):
-                # Extraction du timecode
-                try:
-                    time_part = chapter.split("à ")[1].split(" =>")[0]
-                    text_part = chapter.split("=>")[1].strip()
-
-                    # Création d'une ligne de temps
-                    col1, col2 = st.columns([1, 5])
-                    with col1:
-                        st.markdown(f"""
-                           <div style="background-color:#1E6FCC; color:white; text-align:center; padding:8px; 
-                                       border-radius:5px; font-weight:bold;">
-                               {time_part}
-                           </div>
-                           """, unsafe_allow_html=True)
-                    with col2:
-                        st.markdown(f"""
-                           <div style="background-color:#333; color:white; padding:8px; border-radius:5px; 
-                                       margin-bottom:5px;">
-                               {text_part}
-                           </div>
-                           """, unsafe_allow_html=True)
-                except:
-                    # Fallback si le format n'est pas celui attendu
-                    st.markdown(chapter)
+            # Affichage sous forme de chronologie, en un seul bloc HTML mis en cache
+            st.markdown(render_chapter_timeline(chapters_result), unsafe_allow_html=True)
 
             # Options pour télécharger
             st.download_button(
                 label="Télécharger les chapitres (TXT)",
                 data=chapters_result,
-                file_name=f"chapitres_{int(time.time())}.txt",
+                file_name=f"chapitres_{st.session_state.setdefault('_chapters_stamp', int(time.time()))}.txt",
                 mime="text/plain"
             )
\ No newline at end of file
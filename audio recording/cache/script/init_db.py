@@ -1,6 +1,7 @@
 from core.database import Base, engine, User, APIKey, Transcription, Subscription, get_db
 from core.auth_manager import get_password_hash
 import argparse
+from contextlib import closing
 
 
 def init_database():
@@ -9,29 +10,29 @@ def init_database():
     print("Base de données initialisée avec succès!")
 
 
-def create_admin_user(username, password, email):
-    """Crée un utilisateur admin"""
-    db = next(get_db())
-
-    # Vérifier si l'utilisateur existe déjà
-    existing_user = db.query(User).filter(User.username == username).first()
-    if existing_user:
-        print(f"L'utilisateur {username} existe déjà.")
-        return
-
-    # Créer le nouvel utilisateur admin
-    hashed_password = get_password_hash(password)
-    admin_user = User(
-        username=username,
-        email=email,
-        first_name="Admin",
-        last_name="User",
-        hashed_password=hashed_password,
-        is_admin=True
-    )
-
-    db.add(admin_user)
-    db.commit()
+def create_admin_user(username, password, email, bcrypt_rounds=None):
+    """Crée un utilisateur admin (bcrypt_rounds: coût bcrypt, défaut de la librairie si None)"""
+    # Session fermée à la sortie, transaction validée par db.begin()
+    with closing(next(get_db())) as db, db.begin():
+        # Vérifier si l'utilisateur existe déjà (SELECT de l'id seulement)
+        existing_user_id = db.query(User.id).filter(User.username == username).scalar()
+        if existing_user_id is not None:
+            print(f"L'utilisateur {username} existe déjà.")
+            return
+
+        # Créer le nouvel utilisateur admin
+        hashed_password = get_password_hash(password, bcrypt_rounds)
+        admin_user = User(
+            username=username,
+            email=email,
+            first_name="Admin",
+            last_name="User",
+            hashed_password=hashed_password,
+            is_admin=True
+        )
+
+        db.add(admin_user)
+
     print(f"Utilisateur admin '{username}' créé avec succès!")
 
 
@@ -41,6 +42,8 @@ if __name__ == "__main__":
     parser.add_argument("--username", help="Nom d'utilisateur admin")
     parser.add_argument("--password", help="Mot de passe admin")
     parser.add_argument("--email", help="Email admin")
+    parser.add_argument("--bcrypt-rounds", type=int,
+                        help="Coût bcrypt du mot de passe admin (4-31, à réduire uniquement en dev)")
 
     args = parser.parse_args()
 
@@ -52,4 +55,4 @@ if __name__ == "__main__":
         if not all([args.username, args.password, args.email]):
             print("Erreur: --username, --password et --email sont requis pour créer un admin")
         else:
-            create_admin_user(args.username, args.password, args.email)
\ No newline at end of file
+            create_admin_user(args.username, args.password, args.email, args.bcrypt_rounds)
\ No newline at end of file
@@ -1,21 +1,44 @@
 import unittest
+import asyncio
+import json
 import os
 import sys
 import tempfile
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
+
+import httpx
+from openai import RateLimitError
 
 # Ajout du répertoire parent au chemin pour pouvoir importer les modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import des modules à tester
-from core.utils import chunk_text, create_chapters_from_segments, export_text_file
+from core.utils import (
+    chunk_text, create_chapters_from_segments, export_text_file, get_encoding, segments_to_columns, CHARS_PER_TOKEN
+)
 from core.error_handling import handle_error, ErrorType
 from core.gpt_processor import extract_keywords
+from core import openai_parallel
+from core.openai_parallel import CapacityTracker, run_parallel, record_rate_limits, known_rate_limits
+from core.gpt_batch import poll_batch, collect_summary_batch
+from core.gpt_cache import GPTResultCache
+from core.async_gpt import run_all
+from core.audio_extractor import extract_audio_batch, download_youtube_audio_batch
 
 
 class TestUtils(unittest.TestCase):
     """Tests pour les fonctions utilitaires."""
 
+    @classmethod
+    def setUpClass(cls):
+        # Un seul dossier temporaire pour toute la classe
+        cls._temp_dir = tempfile.TemporaryDirectory()
+        cls.temp_dir = cls._temp_dir.name
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._temp_dir.cleanup()
+
     def test_chunk_text(self):
         """Test de la fonction de découpage de texte."""
         # Test avec un texte court
@@ -33,6 +56,12 @@ class TestUtils(unittest.TestCase):
         self.assertEqual(len(chunks[2]), 30)
         self.assertEqual(len(chunks[3]), 10)
 
+        # Test de coupure en fin de phrase plutôt qu'au milieu d'un mot
+        text = "Première phrase. Deuxième phrase un peu plus longue."
+        chunks = chunk_text(text, max_chars=30)
+        self.assertEqual(chunks[0], "Première phrase. ")
+        self.assertEqual("".join(chunks), text)
+
         # Test avec max_chars à zéro ou négatif
         with self.assertRaises(ValueError):
             chunk_text("Test", max_chars=0)
@@ -41,6 +70,24 @@ class TestUtils(unittest.TestCase):
         chunks = chunk_text("", max_chars=10)
         self.assertEqual(len(chunks), 0)
 
+    def test_chunk_text_encoding_unavailable(self):
+        """Découpage en caractères si la table BPE de tiktoken ne peut pas être chargée."""
+        fake_tiktoken = MagicMock()
+        fake_tiktoken.encoding_for_model.side_effect = KeyError("modele-inconnu")
+        fake_tiktoken.get_encoding.side_effect = ConnectionError("Téléchargement impossible")
+        text = "mot " * 50
+
+        get_encoding.cache_clear()
+        try:
+            with patch('core.utils.tiktoken', fake_tiktoken):
+                chunks = chunk_text(text, max_tokens=5, model="modele-inconnu")
+        finally:
+            get_encoding.cache_clear()
+
+        fake_tiktoken.get_encoding.assert_called_once_with("cl100k_base")
+        self.assertTrue(all(len(chunk) <= 5 * CHARS_PER_TOKEN for chunk in chunks))
+        self.assertEqual("".join(chunks), text)
+
     def test_create_chapters_from_segments(self):
         """Test de la fonction de création de chapitres."""
         # Segments de test
@@ -65,33 +112,41 @@ class TestUtils(unittest.TestCase):
         short_chapters = create_chapters_from_segments(segments, chunk_duration=5)
         self.assertEqual(len(short_chapters), 4)
 
+    def test_segments_to_columns_precision(self):
+        """Les horodatages d'un long enregistrement gardent leur précision à la milliseconde."""
+        segments = [{"start": 36000.123, "end": 36001.457, "text": "Segment après 10 h."}]
+
+        columns = segments_to_columns(segments)
+
+        self.assertEqual(columns["starts"][0], 36000.123)
+        self.assertEqual(columns["ends"][0], 36001.457)
+        self.assertEqual(columns["texts"], ["Segment après 10 h."])
+
     def test_export_text_file(self):
         """Test de la fonction d'export de fichier texte."""
         text = "Contenu du fichier de test."
 
         # Test avec dossier temporaire
-        with tempfile.TemporaryDirectory() as temp_dir:
-            out_path = export_text_file(text, temp_dir, "test.txt")
+        out_path = export_text_file(text, self.temp_dir, "test.txt")
 
-            # Vérifier que le fichier existe
-            self.assertTrue(os.path.exists(out_path))
+        # Vérifier que le fichier existe
+        self.assertTrue(os.path.exists(out_path))
 
-            # Vérifier le contenu
-            with open(out_path, "r", encoding="utf-8") as f:
-                content = f.read()
-                self.assertEqual(content, text)
+        # Vérifier le contenu
+        with open(out_path, "r", encoding="utf-8") as f:
+            content = f.read()
+            self.assertEqual(content, text)
 
         # Test avec texte vide
-        with tempfile.TemporaryDirectory() as temp_dir:
-            result = export_text_file("", temp_dir, "empty.txt")
-            self.assertEqual(result, "")
+        result = export_text_file("", self.temp_dir, "empty.txt")
+        self.assertEqual(result, "")
 
 
 class TestErrorHandling(unittest.TestCase):
     """Tests pour les fonctions de gestion d'erreurs."""
 
-    @patch('logging.error')
-    def test_handle_error(self, mock_logging):
+    @patch('core.error_handling.logger')
+    def test_handle_error(self, mock_logger):
         """Test de la fonction de gestion d'erreurs."""
         # Créer une erreur de test
         test_error = ValueError("Erreur de test")
@@ -103,14 +158,14 @@ class TestErrorHandling(unittest.TestCase):
             "Message utilisateur"
         )
 
-        # Vérifier que logging.error a été appelé
-        mock_logging.assert_called_once()
+        # Vérifier que le logger du module a été appelé (formatage différé)
+        mock_logger.error.assert_called_once_with("%s: %s", ErrorType.PROCESSING_ERROR, test_error)
 
         # Vérifier le message retourné
         self.assertEqual(error_message, "Message utilisateur")
 
         # Tester sans message personnalisé
-        with patch('logging.error'):
+        with patch('core.error_handling.logger'):
             error_message = handle_error(
                 test_error,
                 ErrorType.API_ERROR
@@ -139,5 +194,396 @@ class TestGPTProcessor(unittest.TestCase):
             extract_keywords("", "fake_api_key")
 
 
+def fake_raw_response(content: str, headers=None) -> MagicMock:
+    """Réponse brute (with_raw_response) d'un appel chat.completions."""
+    raw = MagicMock()
+    raw.headers = headers or {}
+    raw.parse.return_value.choices = [MagicMock(message=MagicMock(content=content))]
+    return raw
+
+
+def batch_line(custom_id: str, content: str = None, error: str = None) -> str:
+    """Ligne JSONL d'un fichier de sortie (content) ou d'erreurs (error) de l'API Batch."""
+    if content is not None:
+        response = {"status_code": 200, "body": {"choices": [{"message": {"content": content}}]}}
+        return json.dumps({"custom_id": custom_id, "response": response, "error": None})
+    response = {"status_code": 500, "body": {"error": {"message": error}}}
+    return json.dumps({"custom_id": custom_id, "response": response, "error": None})
+
+
+class TestOpenAIParallel(unittest.TestCase):
+    """Tests des appels GPT parallèles (limites de débit, nouvelles tentatives)."""
+
+    def setUp(self):
+        openai_parallel._known_limits.clear()
+
+    def tearDown(self):
+        openai_parallel._known_limits.clear()
+
+    def test_capacity_tracker(self):
+        """Décompte des seaux et plafonnement d'une requête plus grosse que la limite."""
+        tracker = CapacityTracker(rpm=10, tpm=1000)
+        asyncio.run(tracker.acquire(400))
+        self.assertAlmostEqual(tracker.available_request_capacity, 9, places=2)
+        self.assertAlmostEqual(tracker.available_token_capacity, 600, delta=1)
+
+        # Une requête de plus de tpm tokens est ramenée à tpm au lieu de bloquer
+        tracker = CapacityTracker(rpm=10, tpm=1000)
+        asyncio.run(asyncio.wait_for(tracker.acquire(5000), timeout=1))
+        self.assertLess(tracker.available_token_capacity, 1)
+
+    def test_capacity_tracker_update_limits(self):
+        """Une hausse des limites est disponible immédiatement, une baisse plafonne la capacité."""
+        tracker = CapacityTracker(rpm=10, tpm=1000)
+        tracker.update_limits(100, 5000)
+        self.assertEqual(tracker.available_request_capacity, 100)
+        self.assertEqual(tracker.available_token_capacity, 5000)
+
+        tracker.update_limits(5, 500)
+        self.assertEqual(tracker.available_request_capacity, 5)
+        self.assertEqual(tracker.available_token_capacity, 500)
+
+    def test_record_rate_limits(self):
+        """Limites lues dans les en-têtes x-ratelimit-*; en-têtes absents: valeurs par défaut."""
+        self.assertIsNone(record_rate_limits("sk-test", "gpt-3.5-turbo", {}))
+        self.assertEqual(known_rate_limits("sk-test", "gpt-3.5-turbo"),
+                         (openai_parallel.DEFAULT_RPM, openai_parallel.DEFAULT_TPM))
+
+        headers = {"x-ratelimit-limit-requests": "3500", "x-ratelimit-limit-tokens": "90000"}
+        self.assertEqual(record_rate_limits("sk-test", "gpt-3.5-turbo", headers), (3500.0, 90000.0))
+        self.assertEqual(known_rate_limits("sk-test", "gpt-3.5-turbo"), (3500.0, 90000.0))
+        self.assertNotIn("sk-test", str(openai_parallel._known_limits))
+
+    def _run_with_client(self, create_side_effect, prompts):
+        """Lance run_parallel avec un client AsyncOpenAI simulé; renvoie (réponses, create)."""
+        client = MagicMock()
+        create = AsyncMock(side_effect=create_side_effect)
+        client.chat.completions.with_raw_response.create = create
+        client_class = MagicMock()
+        client_class.return_value.__aenter__.return_value = client
+
+        with patch('core.openai_parallel.AsyncOpenAI', client_class), \
+                patch('core.openai_parallel.httpx.AsyncClient'), \
+                patch('core.openai_parallel.RETRY_BASE_DELAY', 0), \
+                patch('core.openai_parallel.random.random', return_value=0.0):
+            answers = asyncio.run(run_parallel(prompts, "sk-test", model="gpt-3.5-turbo"))
+        return answers, create
+
+    def test_run_parallel_retries_rate_limit(self):
+        """Une erreur 429 est retentée; les limites sont lues dans la réponse, sans requête de sonde."""
+        request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+        rate_limited = RateLimitError("Rate limit", response=httpx.Response(429, request=request), body=None)
+        headers = {"x-ratelimit-limit-requests": "3500", "x-ratelimit-limit-tokens": "90000"}
+
+        answers, create = self._run_with_client(
+            [rate_limited, fake_raw_response(" réponse ", headers)], ["Bonjour"]
+        )
+
+        self.assertEqual(answers, ["réponse"])
+        self.assertEqual(create.await_count, 2)
+        self.assertEqual(known_rate_limits("sk-test", "gpt-3.5-turbo"), (3500.0, 90000.0))
+
+    def test_run_parallel_no_retry_on_client_error(self):
+        """Une erreur définitive n'est pas retentée et revient sous forme "Erreur..."."""
+        answers, create = self._run_with_client(ValueError("requête invalide"), ["Bonjour"])
+
+        self.assertTrue(answers[0].startswith("Erreur"))
+        self.assertEqual(create.await_count, 1)
+
+    def test_run_parallel_gives_up_after_max_attempts(self):
+        """Les erreurs temporaires sont retentées au plus max_attempts fois."""
+        request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+        rate_limited = RateLimitError("Rate limit", response=httpx.Response(429, request=request), body=None)
+
+        answers, create = self._run_with_client(rate_limited, ["Bonjour"])
+
+        self.assertTrue(answers[0].startswith("Erreur"))
+        self.assertEqual(create.await_count, 5)
+
+
+class TestGPTBatch(unittest.TestCase):
+    """Tests de la lecture des résultats de l'API Batch."""
+
+    def _client(self, status="completed", output=None, errors=None):
+        """Client OpenAI simulé: lot dans l'état `status` avec ses fichiers JSONL."""
+        files = {"file-out": output, "file-err": errors}
+        client = MagicMock()
+        client.batches.retrieve.return_value = MagicMock(
+            status=status,
+            output_file_id="file-out" if output is not None else None,
+            error_file_id="file-err" if errors is not None else None,
+        )
+        client.files.content.side_effect = lambda file_id: MagicMock(text="\n".join(files[file_id]) + "\n")
+        return client
+
+    def test_poll_batch_pending_and_failed(self):
+        """Lot en cours: None; lot expiré: RuntimeError."""
+        with patch('core.gpt_batch.get_openai_client', return_value=self._client(status="in_progress")):
+            self.assertIsNone(poll_batch("batch-1", "sk-test"))
+
+        with patch('core.gpt_batch.get_openai_client', return_value=self._client(status="expired")):
+            with self.assertRaises(RuntimeError):
+                poll_batch("batch-1", "sk-test")
+
+    def test_poll_batch_reads_output_and_error_files(self):
+        """Réponses du fichier de sortie, erreurs du fichier d'erreurs, requêtes absentes signalées."""
+        client = self._client(
+            output=[batch_line("chunk-0", content=" résumé 0 ")],
+            errors=[batch_line("chunk-1", error="serveur indisponible")],
+        )
+        with patch('core.gpt_batch.get_openai_client', return_value=client):
+            results = poll_batch("batch-1", "sk-test", expected_ids=["chunk-0", "chunk-1", "chunk-2"])
+
+        self.assertEqual(results["chunk-0"], "résumé 0")
+        self.assertIn("serveur indisponible", results["chunk-1"])
+        self.assertTrue(results["chunk-1"].startswith("Erreur"))
+        self.assertTrue(results["chunk-2"].startswith("Erreur"))
+
+    def test_poll_batch_all_requests_failed(self):
+        """Sans fichier de sortie (toutes les requêtes en échec), seul le fichier d'erreurs est lu."""
+        client = self._client(errors=[batch_line("chunk-0", error="quota dépassé")])
+        with patch('core.gpt_batch.get_openai_client', return_value=client):
+            results = poll_batch("batch-1", "sk-test", expected_ids=["chunk-0"])
+
+        client.files.content.assert_called_once_with("file-err")
+        self.assertTrue(results["chunk-0"].startswith("Erreur"))
+
+    @patch('core.gpt_batch.finalize_summary')
+    @patch('core.gpt_batch.reduce_summaries')
+    def test_collect_summary_batch_missing_chunk(self, mock_reduce, mock_finalize):
+        """Un morceau manquant empêche de produire un résumé partiel."""
+        client = self._client(output=[batch_line("chunk-0", content="résumé 0")])
+        with patch('core.gpt_batch.get_openai_client', return_value=client):
+            summary = collect_summary_batch("batch-1", "sk-test", chunk_count=2)
+
+        self.assertTrue(summary.startswith("Erreur"))
+        self.assertIn("chunk-1", summary)
+        mock_reduce.assert_not_called()
+        mock_finalize.assert_not_called()
+
+    @patch('core.gpt_batch.finalize_summary', return_value="résumé final")
+    @patch('core.gpt_batch.reduce_summaries', side_effect=lambda partials, *args: partials)
+    def test_collect_summary_batch_in_order(self, mock_reduce, mock_finalize):
+        """Les résumés partiels sont fusionnés dans l'ordre des morceaux."""
+        client = self._client(output=[batch_line(f"chunk-{i}", content=f"résumé {i}") for i in (10, 2, 0, 1)]
+                              + [batch_line(f"chunk-{i}", content=f"résumé {i}") for i in range(3, 10)])
+        with patch('core.gpt_batch.get_openai_client', return_value=client):
+            summary = collect_summary_batch("batch-1", "sk-test", chunk_count=11)
+
+        self.assertEqual(summary, "résumé final")
+        self.assertEqual(mock_finalize.call_args[0][0], [f"résumé {i}" for i in range(11)])
+
+
+class TestGPTResultCache(unittest.TestCase):
+    """Tests du cache disque des résultats GPT."""
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.cache = GPTResultCache(os.path.join(self._temp_dir.name, "gpt_cache.sqlite"))
+
+    def tearDown(self):
+        if self.cache._conn is not None:
+            self.cache._conn.close()
+        self._temp_dir.cleanup()
+
+    def test_make_key(self):
+        """Même paramètres, même clé; paramètres différents, clés différentes."""
+        self.assertEqual(GPTResultCache.make_key("summary", "gpt-4o", "abc"),
+                         GPTResultCache.make_key("summary", "gpt-4o", "abc"))
+        self.assertNotEqual(GPTResultCache.make_key("summary", "gpt-4o", "abc"),
+                            GPTResultCache.make_key("keywords", "gpt-4o", "abc"))
+
+    def test_ttl(self):
+        """Un résultat est servi tant qu'il a moins de `ttl` secondes, puis purgé."""
+        with patch('core.gpt_cache.time.time', return_value=1000.0):
+            self.cache.set("cle", "résumé", ttl=60)
+        with patch('core.gpt_cache.time.time', return_value=1059.0):
+            self.assertEqual(self.cache.get("cle", ttl=60), "résumé")
+        with patch('core.gpt_cache.time.time', return_value=1061.0):
+            self.assertIsNone(self.cache.get("cle", ttl=60))
+            # L'écriture suivante purge l'entrée expirée
+            self.cache.set("autre", "mots-clés", ttl=60)
+
+        count = self.cache._conn.execute("SELECT COUNT(*) FROM gpt_results").fetchone()[0]
+        self.assertEqual(count, 1)
+
+    def test_default_path_in_local_storage(self):
+        """Sans chemin explicite, la base est créée dans le dossier "cache" du stockage local."""
+        cache_dir = os.path.join(self._temp_dir.name, "cache")
+        os.makedirs(cache_dir)
+        cache = GPTResultCache(path=None)
+
+        with patch('core.storage_manager.storage_manager') as mock_storage:
+            mock_storage.get_local_dir.return_value = cache_dir
+            cache.set("cle", "résumé", ttl=60)
+
+        mock_storage.get_local_dir.assert_called_once_with("cache")
+        self.assertEqual(cache.path, os.path.join(cache_dir, "gpt_cache.sqlite"))
+        self.assertEqual(cache.get("cle", ttl=60), "résumé")
+        cache._conn.close()
+
+    def test_unreadable_file(self):
+        """Un fichier inaccessible se comporte comme un cache vide."""
+        cache = GPTResultCache(self._temp_dir.name)
+        cache.set("cle", "résumé", ttl=60)
+        self.assertIsNone(cache.get("cle", ttl=60))
+
+
+class TestAsyncGPT(unittest.TestCase):
+    """Tests de la génération groupée résumé + mots-clés."""
+
+    @patch('core.async_gpt.run_parallel', new_callable=AsyncMock)
+    @patch('core.async_gpt.combined_analysis', return_value={"summary": "résumé", "keywords": "mots"})
+    def test_run_all_combined(self, mock_combined, mock_run_parallel):
+        """Texte court: un seul appel combiné, aucun appel séparé."""
+        results = asyncio.run(run_all("sk-test", "Texte court."))
+
+        self.assertEqual(results, {"summary": "résumé", "keywords": "mots"})
+        mock_combined.assert_called_once()
+        mock_run_parallel.assert_not_called()
+
+    @patch('core.async_gpt.run_parallel', new_callable=AsyncMock, return_value=["résumé", "mots"])
+    @patch('core.async_gpt.combined_analysis', return_value=None)
+    def test_run_all_combined_fallback(self, mock_combined, mock_run_parallel):
+        """Réponse combinée inexploitable: repli sur les prompts séparés."""
+        results = asyncio.run(run_all("sk-test", "Texte court."))
+
+        self.assertEqual(results, {"summary": "résumé", "keywords": "mots"})
+        self.assertEqual(len(mock_run_parallel.await_args[0][0]), 2)
+
+    def test_run_all_empty_text(self):
+        """Un texte vide est refusé."""
+        with self.assertRaises(ValueError):
+            asyncio.run(run_all("sk-test", ""))
+
+
+class TestTextDigest(unittest.TestCase):
+    """Tests de l'empreinte du texte transcrit utilisée par les clés de cache GPT."""
+
+    def test_digest_reused_for_equal_copy(self):
+        """Une copie du texte (ex: nettoyage UTF-8) réutilise l'empreinte déjà calculée."""
+        from my_page import transcription_4 as page
+
+        session = {}
+        text = "Texte transcrit é"
+        copy = text.encode('utf-8', errors='replace').decode('utf-8')
+        self.assertIsNot(copy, text)
+
+        with patch.object(page, 'get_session_value', side_effect=lambda key, default=None: session.get(key, default)), \
+                patch.object(page, 'set_session_value', side_effect=session.__setitem__), \
+                patch.object(page, 'content_digest', return_value="empreinte") as mock_digest:
+            first = page.gpt_cache_key("summary", "gpt-3.5-turbo", text, "bullet", 0.7)
+            second = page.gpt_cache_key("summary", "gpt-3.5-turbo", copy, "bullet", 0.7)
+            page.gpt_cache_key("summary", "gpt-3.5-turbo", text + " modifié", "bullet", 0.7)
+
+        self.assertEqual(first, second)
+        self.assertEqual(mock_digest.call_count, 2)
+
+
+class TestDashboard(unittest.TestCase):
+    """Tests des métriques du tableau de bord."""
+
+    @patch('core.database.get_db', side_effect=RuntimeError("Base de données indisponible"))
+    def test_usage_metrics_fallback(self, mock_get_db):
+        """Si la requête des métriques échoue, des données fictives sont renvoyées."""
+        import pandas as pd
+        from my_page.dashboard_1 import get_user_usage_metrics, SUMMARY_METRICS
+
+        df = get_user_usage_metrics(user_id=1)
+
+        mock_get_db.assert_called_once()
+        self.assertIsInstance(df, pd.DataFrame)
+        self.assertEqual(len(df), 31)
+        self.assertEqual(list(df.columns), ['date', *SUMMARY_METRICS])
+
+
+class TestAudioExtractor(unittest.TestCase):
+    """Tests de l'extraction audio en lot."""
+
+    @patch('core.audio_extractor.probe_audio_codec', return_value=None)
+    def test_extract_audio_batch_results(self, mock_probe):
+        """Chaque vidéo donne (chemin audio, None) ou (None, message d'erreur), dans l'ordre des entrées."""
+        def fake_process(*cmd, **kwargs):
+            process = MagicMock()
+            failed = "corrompu" in cmd[3]
+            process.returncode = 1 if failed else 0
+            stderr = b"ffmpeg version 6\ncorrompu.mp4: Invalid data found when processing input" if failed else b""
+            process.communicate = AsyncMock(return_value=(None, stderr))
+            return process
+
+        with patch('core.audio_extractor.asyncio.create_subprocess_exec', side_effect=fake_process) as mock_exec:
+            results = extract_audio_batch(["/videos/a.mp4", "/videos/corrompu.mp4", ""])
+
+        self.assertEqual(results[0], (os.path.join(tempfile.gettempdir(), "a.ogg"), None))
+        self.assertEqual(results[1], (None, "corrompu.mp4: Invalid data found when processing input"))
+        self.assertIsNone(results[2][0])
+        self.assertIn("Aucun fichier", results[2][1])
+        self.assertEqual(mock_exec.call_count, 2)
+        self.assertIn('-threads', mock_exec.call_args[0])
+
+    @patch('core.audio_extractor.yt_dlp.YoutubeDL')
+    def test_download_youtube_audio_batch_single_session(self, mock_youtube_dl):
+        """Une seule session yt-dlp pour toutes les URLs; une URL en échec n'arrête pas les autres."""
+        def fake_extract_info(url, download=True):
+            if "erreur" in url:
+                raise RuntimeError("Vidéo indisponible")
+            video_id = url.rsplit("=", 1)[1]
+            output_dir = os.path.dirname(mock_youtube_dl.call_args[0][0]['outtmpl'])
+            with open(os.path.join(output_dir, f"{video_id}.opus"), "wb") as f:
+                f.write(video_id.encode())
+            return {"id": video_id}
+
+        ydl = mock_youtube_dl.return_value.__enter__.return_value
+        ydl.extract_info.side_effect = fake_extract_info
+
+        results = download_youtube_audio_batch([
+            "https://www.youtube.com/watch?v=abc",
+            "https://www.youtube.com/watch?v=erreur",
+            "https://www.youtube.com/watch?v=def",
+        ])
+
+        mock_youtube_dl.assert_called_once()
+        self.assertEqual(results[0], ("https://www.youtube.com/watch?v=abc", b"abc"))
+        self.assertIsInstance(results[1][1], str)
+        self.assertEqual(results[2], ("https://www.youtube.com/watch?v=def", b"def"))
+
+
+class TestTranscription(unittest.TestCase):
+    """Tests de la transcription locale."""
+
+    def test_batched_backend_is_opt_in(self):
+        """faster-whisper n'est utilisé que si WHISPER_BACKEND le demande et que le paquet est installé."""
+        from core import transcription
+
+        with patch.object(transcription, 'BatchedInferencePipeline', MagicMock()):
+            with patch.object(transcription, 'WHISPER_BACKEND', "openai-whisper"):
+                self.assertFalse(transcription.use_batched_backend())
+            with patch.object(transcription, 'WHISPER_BACKEND', "faster-whisper"):
+                self.assertTrue(transcription.use_batched_backend())
+
+        with patch.object(transcription, 'BatchedInferencePipeline', None), \
+                patch.object(transcription, 'WHISPER_BACKEND', "faster-whisper"):
+            self.assertFalse(transcription.use_batched_backend())
+
+    def test_transcribe_batched_progress(self):
+        """La progression est signalée à chaque segment produit par faster-whisper."""
+        from core.transcription import _transcribe_batched
+
+        segments = [MagicMock(start=0.0, end=5.0, text="Bonjour"), MagicMock(start=5.0, end=10.0, text=" à tous")]
+        pipeline = MagicMock()
+        pipeline.transcribe.return_value = (iter(segments), MagicMock(duration=10.0, language="fr"))
+        progress_callback = MagicMock()
+
+        result = _transcribe_batched(pipeline, "audio.wav", False, progress_callback)
+
+        progress = [c[0][0] for c in progress_callback.call_args_list]
+        self.assertEqual(len(progress), 2)
+        self.assertAlmostEqual(progress[0], 0.55)
+        self.assertAlmostEqual(progress[1], 0.95)
+        self.assertEqual(result["text"], "Bonjour à tous")
+        self.assertEqual(result["language"], "fr")
+        self.assertEqual(list(result["segments"]["ends"]), [5.0, 10.0])
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file